@@ -18,6 +18,19 @@ Game Algorithm Name: Alpha-Beta Search Algorithm
 from __future__ import print_function 
 import sys
 import copy
+import argparse
+import random
+import time
+import json
+import multiprocessing
+import tempfile
+import shutil
+import struct
+import mmap
+try:
+    import numpy as np
+except ImportError: # NumPy is only needed by the vectorized evaluation.
+    np = None
 
 __all__ = []
 __version__ = 1.0
@@ -48,6 +61,40 @@ N = 8 # Define max. row number.
 BLACK_SYMBLE = 'X'
 WHITE_SYMBLE = 'O'
 PASS2TERMINAL = 2 #Pass two times will terminal the game.
+# Direction (increase_i, increase_j) of D1 = upper, D2 = upper right, D3 = right, D4 = bottom right, D5 = bottom, D6 = bottom left, D7 = left, D8 = upper left.
+DIRECTIONS = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
+DIRECTION_INDEX = dict((_direction, _k) for _k, _direction in enumerate(DIRECTIONS))
+BOARD_ENGINE = 'bitboard' # or 'list'. Bitboard engine keeps each side in a 64-bit integer.
+TRANSPOSITION_TABLE = False # True will remember searched positions by Zobrist hashing. The traverse log will skip those sub trees.
+TT_MAX_ENTRIES = 1 << 20 # Memory cap of the transposition table in number of entries.
+TT_EXACT = 0 # Bound types of a transposition table entry.
+TT_LOWERBOUND = 1
+TT_UPPERBOUND = 2
+ITERATIVE_DEEPENING = False # True will search depth 1, 2, 3, ... until the time or node budget runs out, instead of the input depth.
+SEARCH_TIME_LIMIT = 1.0 # Wall-clock budget in seconds per move for iterative deepening, or None.
+SEARCH_NODE_LIMIT = None # Node budget per move for iterative deepening, or None.
+INCREMENTAL_EVALUATION = True # True keeps the utility up to date when moves are applied and undone, instead of scanning the board on every leaf.
+PARALLEL_WORKERS = 0 # 2 or more will split root moves of executeParallelSearch across processes. The traverse log is not produced.
+MOVE_ORDERING = None # None keeps the row-major order, or a list of heuristics from ['hash', 'killer', 'history', 'weight'] by priority.
+BATCH_WORKERS = multiprocessing.cpu_count() # Worker processes of the batch analysis.
+TRACE_SINK = 'list' # Destination of the traverse log: 'list' in memory, 'file' streamed as text, 'binary' streamed as packed records, or None to drop it.
+TRACE_BUFFER_ROWS = 4096 # Rows kept in memory before a streaming trace sink writes them to its file.
+TRACE_RECORD = struct.Struct('<hbiii') # Binary trace row = node code, depth, value, alpha, beta.
+TRACE_INFINITE = 2 ** 31 - 1 # Infinity of a binary trace row.
+TRACE_ROOT = -1 # Node codes of a binary trace row besides i * N + j of a move.
+TRACE_PASS = -2
+OPENING_BOOK = None # None, or file name of an opening book built by --build-book, e.g. 'opening_book.bin'. Book positions are answered without search.
+ENDGAME_EMPTIES = 0 # Positions with this many empty cells or less are solved exactly to the end of the game by disc count. 0 is off.
+SEARCH_ALGORITHM = 'alphabeta' # or 'pvs'. Principal Variation Search with aspiration windows visits fewer nodes, but does not produce the traverse log.
+ASPIRATION_WINDOW = 16 # Half width of the root window of PVS around the guessed value.
+ARRAY_BLACK = 1 # Cells of a board array of the vectorized evaluation. Empty cells are 0.
+ARRAY_WHITE = -1
+ENDGAME_SORT_EMPTIES = 6 # The endgame solver orders moves by opponent mobility above this many empty cells.
+STATS_FILE = None # None, or file name to save the SearchStats of the search as JSON.
+STATS_CLOCK = getattr(time, 'perf_counter', time.time) # Timer of SearchStats.
+BOOK_MAGIC = b'RVBK'
+BOOK_HEADER = struct.Struct('<4sI') # Opening book file = magic, number of records, 
+BOOK_RECORD = struct.Struct('<QQbh') #    then sorted records of player bitboard, opponent bitboard, move index, value.
 
 def getInputData(filename):
 #
@@ -99,28 +146,11 @@ def setOutputData(filename, actions, next_state):
                 print(_item, end ='')
             print(end ='\n')                
         print ('Node,Depth,Value,Alpha,Beta')
-        for action in actions:
-            print ('%s,%d'%(action[0], int(action[1])), end='')
-            if action[2] == float('inf') :
-                print (',Infinity', end='')
-            elif action[2] == float('-inf') :
-                print (',-Infinity', end='')
-            else:
-                print (',%.0f'%(action[2]), end='')
-                
-            if action[3] == float('inf') :
-                print (',Infinity', end='')
-            elif action[3] == float('-inf') :
-                print (',-Infinity', end='')
-            else:
-                print (',%.0f'%(action[3]), end='')
-                
-            if action[4] == float('inf') :
-                print (',Infinity', end='\n')
-            elif action[4] == float('-inf') :
-                print (',-Infinity', end='\n')
-            else:
-                print (',%.0f'%(action[4]), end='\n')
+        if isinstance(actions, TraceSink):
+            actions.writeTo(sys.stdout)
+        else:
+            for action in actions:
+                print (getActionText(action))
         sys.stdout.flush()       
         if filename != None :
             sys.stdout = orig_stdout                   
@@ -133,8 +163,623 @@ def setOutputData(filename, actions, next_state):
         else :
             pass
         exit()
+
+def getActionText(action):
+#
+# Format one row of traverse log = [node, depth, value, alpha, beta] as 'Node,Depth,Value,Alpha,Beta'.
+#
+    _text = '%s,%d'%(action[0], int(action[1]))
+    for _value in action[2:5]:
+        if _value == float('inf') :
+            _text += ',Infinity'
+        elif _value == float('-inf') :
+            _text += ',-Infinity'
+        else:
+            _text += ',%.0f'%(_value)
+    return _text
+
+def getRayTable(m=M, n=N):
+#
+# Precompute the ordered cells along each direction from every cell of a mXn board.
+#  ray_table[i][j][k] = [(x1, y1), (x2, y2), ...] from the neighbor of (i, j) to the border on DIRECTIONS[k].
+#  Move generation and flipping walk these lists instead of computing bounds and ranges on every call.
+#
+    _ray_table = []
+    for i in range(m):
+        _row = []
+        for j in range(n):
+            _rays = []
+            for _increase_i, _increase_j in DIRECTIONS:
+                _ray = []
+                x = i + _increase_i
+                y = j + _increase_j
+                while x >= 0 and x < m and y >= 0 and y < n:
+                    _ray.append((x, y))
+                    x += _increase_i
+                    y += _increase_j
+                _rays.append(_ray)
+            _row.append(_rays)
+        _ray_table.append(_row)
+    return _ray_table
+
+
+#
+# Game configuration: board dimensions, weighting matrix and symbols of a game, and the tables derived from them.
+#
+
+class GameConfig(object):
+    '''
+    Board dimensions, weighting matrix and piece symbols of a Reversi game, 
+    with the ray tables of move generation, coordinate labels and bitboard masks and row weights built from them.
+    The tables are built once by the constructor, so get configurations by getGameConfig, which keeps one instance per setting.
+    '''
+
+    def __init__(self, m=M, n=N, weight_matrix=WEIGHT_MATRIX, black_symbol=BLACK_SYMBLE, white_symbol=WHITE_SYMBLE):
+        self.m = m
+        self.n = n
+        self.weight_matrix = [list(_row) for _row in weight_matrix]
+        self.black_symbol = black_symbol
+        self.white_symbol = white_symbol
+        # Coordinate labels of the traverse log: column a, b, c, ... and row 1, 2, 3, ...
+        self.labels = [[NUMBER2ALPHABET.get(j + 1, chr(ord('a') + j)) + str(i + 1) for j in range(n)] for i in range(m)]
+        self.node_codes = dict((self.labels[i][j], i * n + j) for i in range(m) for j in range(n)) # Node codes of a binary trace row.
+        self.node_codes.update({'root': TRACE_ROOT, 'pass': TRACE_PASS})
+        self.node_labels = dict((_code, _label) for _label, _code in self.node_codes.items())
+        if (m, n) not in ray_tables: # Configurations of the same size share the ray table.
+            ray_tables[(m, n)] = getRayTable(m, n)
+        else:
+            pass
+        self.ray_table = ray_tables[(m, n)]
+        # Bitboards: cell (i, j) maps to bit i*n + j.
+        self.bitboard_full = (1 << (m * n)) - 1
+        self.not_first_column = self.bitboard_full ^ sum(1 << (i * n) for i in range(m)) # Clear the first column after a shift to the right.
+        self.not_last_column = self.bitboard_full ^ sum(1 << (i * n + n - 1) for i in range(m)) # Clear the last column after a shift to the left.
+        # (shift, mask) pairs of the directions moving toward higher bits and toward lower bits.
+        # The mask removes pieces which wrap around to the other side of the board.
+        self.left_shifts = [(_d[0] * n + _d[1], self.getBitboardShift(self.bitboard_full, _d)) for _d in DIRECTIONS if _d[0] * n + _d[1] > 0]
+        self.right_shifts = [(-(_d[0] * n + _d[1]), self.getBitboardShift(self.bitboard_full, _d)) for _d in DIRECTIONS if _d[0] * n + _d[1] < 0]
+        # getBitboardMoves spreads 6 times, enough for 8 cells. Longer lines need extra spreads.
+        self.extra_spreads = range(max(m, n) - 8) if max(m, n) > 8 else []
+        # Weight sum of the n cells of a row for every n-bit occupancy pattern, one table per row.
+        self.row_mask = (1 << n) - 1
+        self.row_weights = [[sum(self.weight_matrix[i][j] for j in range(n) if (_pattern >> j) & 1) for _pattern in range(1 << n)] for i in range(m)]
+
+    def getBitboardShift(self, bitboard, direction):
+        # Move every piece of the bitboard one cell toward the direction, pieces leaving the board are dropped.
+        _shift = direction[0] * self.n + direction[1]
+        if _shift > 0:
+            bitboard = bitboard << _shift
+        else:
+            bitboard = bitboard >> -_shift
+        if direction[1] == 1:
+            bitboard &= self.not_first_column
+        elif direction[1] == -1:
+            bitboard &= self.not_last_column
+        return bitboard & self.bitboard_full
+
+def getGameConfig(m=M, n=N, weight_matrix=WEIGHT_MATRIX, black_symbol=BLACK_SYMBLE, white_symbol=WHITE_SYMBLE):
+#
+# Return the cached game configuration of the setting, build it on the first call.
+#
+    _key = (m, n, tuple(tuple(_row) for _row in weight_matrix), black_symbol, white_symbol)
+    if _key not in game_configs:
+        game_configs[_key] = GameConfig(m, n, weight_matrix, black_symbol, white_symbol)
+    else:
+        pass
+    return game_configs[_key]
+
+ray_tables = {} # Ray tables by board size (m, n).
+game_configs = {} # Game configurations by setting.
+DEFAULT_CONFIG = getGameConfig() # The game of the global variables M, N, WEIGHT_MATRIX, BLACK_SYMBLE and WHITE_SYMBLE.
+RAY_TABLE = DEFAULT_CONFIG.ray_table
+TRACE_NODE_CODES = DEFAULT_CONFIG.node_codes
+TRACE_NODE_LABELS = DEFAULT_CONFIG.node_labels
+
+#
+# Trace sinks: destinations of the traverse log rows = [node, depth, value, alpha, beta].
+#    The search calls append() once per visited node, and setOutputData() calls writeTo() to print the log after the next state.
+#
+
+class TraceSink(object):
+    '''
+    Base class of a traverse log destination, which keeps the rows in a list. 
+    Subclasses store the rows elsewhere by overriding append(action), __iter__() and __len__(), 
+    writeTo(fp) prints the rows as text and close() releases the storage.
+    '''
+    def __init__(self):
+        self.rows = []
+
+    def append(self, action):
+        self.rows.append(action)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def writeTo(self, fp):
+        for _action in self:
+            fp.write(getActionText(_action) + '\n')
+
+    def close(self):
+        pass
+
+
+class ListTraceSink(list, TraceSink):
+    '''
+    Keep all rows in memory as a list of lists. It is the original traverse log and can be indexed like a list.
+    '''
+    pass
+
+
+class NullTraceSink(TraceSink):
+    '''
+    Drop all rows, for searches whose traverse log is not needed.
+    '''
+    def append(self, action):
+        pass
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+
+class FileTraceSink(TraceSink):
+    '''
+    Stream rows as text lines into a temporary file, buffer_rows rows per write, so the memory does not grow with the number of nodes.
+    writeTo(fp) copies the file to the output without reading it back row by row.
+    '''
+    def __init__(self, buffer_rows=TRACE_BUFFER_ROWS):
+        self.buffer_rows = buffer_rows
+        self.buffer = []
+        self.rows = 0
+        self.fp = tempfile.TemporaryFile(mode='w+')
+
+    def append(self, action):
+        self.buffer.append(getActionText(action))
+        if len(self.buffer) >= self.buffer_rows:
+            self.flush()
+        else:
+            pass
+
+    def flush(self):
+        if self.buffer:
+            self.fp.write('\n'.join(self.buffer) + '\n')
+            self.rows += len(self.buffer)
+            self.buffer = []
+        else:
+            pass
+
+    def __len__(self):
+        return self.rows + len(self.buffer)
+
+    def __iter__(self):
+        # Parse the text rows back to [node, depth, value, alpha, beta].
+        self.flush()
+        self.fp.flush()
+        self.fp.seek(0)
+        for _line in self.fp:
+            _fields = _line.rstrip('\n').split(',')
+            yield [_fields[0], int(_fields[1])] + [float(_field.replace('Infinity', 'inf')) for _field in _fields[2:5]]
+        self.fp.seek(0, 2)
+
+    def writeTo(self, fp):
+        self.flush()
+        self.fp.flush()
+        self.fp.seek(0)
+        shutil.copyfileobj(self.fp, fp)
+        self.fp.seek(0, 2)
+
+    def close(self):
+        self.buffer = []
+        self.fp.close()
+
+
+class BinaryTraceSink(TraceSink):
+    '''
+    Pack each row into a fixed size binary record of TRACE_RECORD = (node code, depth, value, alpha, beta),
+    15 bytes instead of a few hundred bytes of a Python list, and spill the records to a temporary file every buffer_rows rows.
+    Node code is i * n + j of a move, TRACE_ROOT or TRACE_PASS, by the labels of the game configuration. Infinite values are kept as TRACE_INFINITE.
+    '''
+    def __init__(self, buffer_rows=TRACE_BUFFER_ROWS, config=None):
+        self.buffer_rows = buffer_rows
+        self.config = config if config is not None else DEFAULT_CONFIG
+        self.buffer = bytearray()
+        self.rows = 0
+        self.fp = tempfile.TemporaryFile(mode='w+b')
+
+    def append(self, action):
+        _values = []
+        for _value in action[2:5]:
+            if _value == POSITIVE_INFINITE:
+                _values.append(TRACE_INFINITE)
+            elif _value == NEGATIVE_INFINITE:
+                _values.append(-TRACE_INFINITE)
+            else:
+                _values.append(int(_value))
+        self.buffer += TRACE_RECORD.pack(self.config.node_codes[action[0]], int(action[1]), *_values)
+        self.rows += 1
+        if len(self.buffer) >= self.buffer_rows * TRACE_RECORD.size:
+            self.flush()
+        else:
+            pass
+
+    def flush(self):
+        if self.buffer:
+            self.fp.write(self.buffer)
+            self.buffer = bytearray()
+        else:
+            pass
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        # Unpack the records back to [node, depth, value, alpha, beta] by chunks of buffer_rows records.
+        self.flush()
+        self.fp.flush()
+        self.fp.seek(0)
+        while True:
+            _chunk = self.fp.read(self.buffer_rows * TRACE_RECORD.size)
+            if not _chunk:
+                break
+            else:
+                pass
+            for _offset in range(0, len(_chunk), TRACE_RECORD.size):
+                _record = TRACE_RECORD.unpack_from(_chunk, _offset)
+                _values = []
+                for _value in _record[2:5]:
+                    if _value >= TRACE_INFINITE:
+                        _values.append(POSITIVE_INFINITE)
+                    elif _value <= -TRACE_INFINITE:
+                        _values.append(NEGATIVE_INFINITE)
+                    else:
+                        _values.append(_value)
+                yield [self.config.node_labels[_record[0]], _record[1]] + _values
+        self.fp.seek(0, 2)
+
+    def close(self):
+        self.buffer = bytearray()
+        self.fp.close()
+
+TRACE_SINKS = {'list': ListTraceSink, 'file': FileTraceSink, 'binary': BinaryTraceSink, None: NullTraceSink}
+
+def getTraceSink(kind=TRACE_SINK, config=None):
+#
+# Construct an empty trace sink of kind 'list', 'file', 'binary' or None for the game configuration.
+#
+    if kind == 'binary':
+        return BinaryTraceSink(TRACE_BUFFER_ROWS, config)
+    else:
+        return TRACE_SINKS[kind]()
         
                 
+class SearchTimeout(Exception):
+    # Raised inside the search when the time or node budget of iterative deepening runs out.
+    pass
+
+
+#
+# Zobrist hashing and Transposition Table
+#    A position is hashed by XOR of a random 64-bit key for each (piece, cell) and a key for the side to move.
+#    The hash is updated incrementally when a piece is placed or flipped.
+#
+
+class ZobristHash(object):
+    '''
+    Random keys for Zobrist hashing of a MXN Reversi board of the game configuration.
+    '''
+
+    def __init__(self, seed=0, config=None):
+        _random = random.Random(seed)
+        self.config = config if config is not None else DEFAULT_CONFIG
+        self.keys = {}
+        for _player in (self.config.black_symbol, self.config.white_symbol):
+            self.keys[_player] = [_random.getrandbits(64) for _index in range(self.config.m * self.config.n)]
+        self.side_key = _random.getrandbits(64) # XOR into the hash when MIN player is to move.
+        # Terminal test depends on the number of continuous passes, so it is part of the position.
+        self.pass_keys = [0] + [_random.getrandbits(64) for _count in range(PASS2TERMINAL + 1)]
+
+    def getHash(self, state):
+        # Hash a list of lists board.
+        _key = 0
+        for i, row in enumerate(state):
+            for j, cell in enumerate(row):
+                if cell in self.keys:
+                    _key ^= self.keys[cell][i * self.config.n + j]
+                else:
+                    pass
+        return _key
+
+    def getBitboardHash(self, bitboards):
+        # Hash a (black bitboard, white bitboard) board.
+        _key = 0
+        for _player, _bitboard in zip((self.config.black_symbol, self.config.white_symbol), bitboards):
+            _keys = self.keys[_player]
+            while _bitboard:
+                _bit = _bitboard & -_bitboard
+                _bitboard ^= _bit
+                _key ^= _keys[_bit.bit_length() - 1]
+        return _key
+
+
+class TranspositionTable(object):
+    '''
+    A fixed size hash table of searched positions.
+    Entry = (hash key, remaining depth, value, bound type, best move (i, j), search generation)
+    Replacement policy: an entry is replaced by the same position, by any position of a new search generation,
+    or by a position searched at least as deep. Otherwise the deeper entry is kept.
+    '''
+
+    def __init__(self, max_entries=TT_MAX_ENTRIES, seed=0, config=None):
+        self.size = 1
+        while self.size * 2 <= max_entries:
+            self.size *= 2
+        self.mask = self.size - 1
+        self.table = [None] * self.size
+        self.zobrist = ZobristHash(seed, config) # Keys of the game configuration of the searches which share the table.
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejects = 0
+
+    def newSearch(self):
+        # Entries of older searches can always be replaced.
+        self.generation += 1
+
+    def probe(self, key, depth, a, b):
+        # Return the stored value if it is deep enough and its bound causes a cutoff of window (a, b), otherwise None.
+        self.probes += 1
+        _entry = self.table[key & self.mask]
+        if _entry is None or _entry[0] != key:
+            return None
+        else:
+            self.hits += 1
+        if _entry[1] < depth:
+            return None
+        elif _entry[3] == TT_EXACT or (_entry[3] == TT_LOWERBOUND and _entry[2] >= b) or (_entry[3] == TT_UPPERBOUND and _entry[2] <= a):
+            self.cutoffs += 1
+            return _entry[2]
+        else:
+            return None
+
+    def getBestMove(self, key):
+        # Return the best move (i, j) stored for the position, or None.
+        _entry = self.table[key & self.mask]
+        if _entry is None or _entry[0] != key:
+            return None
+        else:
+            return _entry[4]
+
+    def store(self, key, depth, value, bound, best_move=None):
+        _index = key & self.mask
+        _entry = self.table[_index]
+        if _entry is None:
+            pass
+        elif _entry[0] == key or _entry[5] != self.generation or _entry[1] <= depth:
+            self.replacements += 1
+        else:
+            self.rejects += 1
+            return
+        self.stores += 1
+        self.table[_index] = (key, depth, value, bound, best_move, self.generation)
+
+    def getStatistics(self):
+        # Report table usage and hit / cutoff counts.
+        return {'size': self.size, 'probes': self.probes, 'hits': self.hits, 'cutoffs': self.cutoffs,
+                'stores': self.stores, 'replacements': self.replacements, 'rejects': self.rejects}
+
+    def clear(self):
+        self.table = [None] * self.size
+        self.generation = 0
+
+
+#
+# Move Ordering
+#    Sort valid moves so that the moves which most likely cause alpha-beta cutoffs are searched first.
+#
+
+class MoveOrdering(object):
+    '''
+    Pluggable move ordering heuristics, applied by priority of the heuristics list:
+        'hash': the best move stored in the transposition table by earlier searches.
+        'killer': the last two moves which caused a cutoff on the same depth.
+        'history': moves weighted by how often (and how deep) they caused cutoffs in the whole search.
+        'weight': static weighting matrix priority of the game configuration, corners first and X-squares last.
+    Ties keep the row-major order of getActions.
+    '''
+
+    def __init__(self, heuristics=['hash', 'killer', 'history', 'weight'], config=None):
+        self.heuristics = list(heuristics)
+        self.config = config if config is not None else DEFAULT_CONFIG
+        self.killers = {} # {depth: [move1, move2]}
+        self.history = {} # {player: [score of cell i*n+j]}
+        self.clear()
+
+    def getOrderedActions(self, actions, current_depth, player, hash_move=None):
+        _killers = self.killers.get(current_depth, [])
+        _history = self.history[player]
+        _keys = []
+        for _action in actions:
+            _move = (_action[0], _action[1])
+            _key = []
+            for _heuristic in self.heuristics:
+                if _heuristic == 'hash':
+                    _key.append(_move == hash_move)
+                elif _heuristic == 'killer':
+                    _key.append(2 - _killers.index(_move) if _move in _killers else 0)
+                elif _heuristic == 'history':
+                    _key.append(_history[_move[0] * self.config.n + _move[1]])
+                elif _heuristic == 'weight':
+                    _key.append(self.config.weight_matrix[_move[0]][_move[1]])
+                else:
+                    pass
+            _keys.append(_key)
+        _order = sorted(range(len(actions)), key=lambda _index: _keys[_index], reverse=True)
+        # sorted with reverse=True keeps the original order of equal keys.
+        return [actions[_index] for _index in _order]
+
+    def setCutoff(self, move, current_depth, remaining_depth, player):
+        # Remember the move which caused a cutoff.
+        if move == (-9, -9):
+            return
+        else:
+            pass
+        _killers = self.killers.setdefault(current_depth, [])
+        if move not in _killers:
+            _killers.insert(0, move)
+            del _killers[2:]
+        else:
+            pass
+        self.history[player][move[0] * self.config.n + move[1]] += remaining_depth * remaining_depth
+
+    def clear(self):
+        _cells = self.config.m * self.config.n
+        self.killers = {}
+        self.history = {self.config.black_symbol: [0] * _cells, self.config.white_symbol: [0] * _cells}
+
+
+#
+# Search Statistics
+#    Counters and timers of a search, kept apart from the search so that a search without them pays nothing.
+#
+
+class SearchStats(object):
+    '''
+    Structured statistics of a search, exported as a dictionary or JSON:
+        nodes per depth, cutoffs per depth, beta cutoffs by the index of the move which caused them, leaves evaluated, 
+        passes searched, effective branching factor and time spent in move generation, evaluation and applying / copying moves.
+    attach() wraps getActions, getLeafUtility, makeMove, unmakeMove and setResult of the search object with timers,
+    and detach() removes the wrappers and collects the counters of the search.
+    '''
+
+    def __init__(self, search=None):
+        self.search = None
+        self.algorithm = ''
+        self.depth = 0
+        self.nodes = 0
+        self.nodes_per_depth = []
+        self.cutoffs_per_depth = []
+        self.cutoff_indices = [] # Number of cutoffs caused by the first, second, ... move in the search order.
+        self.leaves = 0
+        self.passes = 0
+        self.researches = 0
+        self.times = {'movegen': 0.0, 'evaluation': 0.0, 'copy': 0.0}
+        self.calls = {'movegen': 0, 'evaluation': 0, 'copy': 0}
+        self.total_time = 0.0
+        self.start_time = None
+        self.running = [False] # A timed method is running.
+        self.transposition_table = None
+        if search is not None:
+            self.attach(search)
+        else:
+            pass
+
+    def attach(self, search, algorithm=''):
+        self.search = search
+        self.algorithm = algorithm
+        search.stats = self
+        search.getActions = self.getTimer('movegen', search.getActions)
+        search.getLeafUtility = self.getTimer('evaluation', search.getLeafUtility)
+        search.makeMove = self.getTimer('copy', search.makeMove, True)
+        search.unmakeMove = self.getTimer('copy', search.unmakeMove)
+        search.setResult = self.getTimer('copy', search.setResult)
+        self.start_time = STATS_CLOCK()
+
+    def getTimer(self, kind, method, count_passes=False):
+        # Wrap a method of the search to add its running time to times[kind].
+        # A call made inside another timed call, e.g. setResult by makeMove of the bitboard engine, is not timed again.
+        _times = self.times
+        _calls = self.calls
+        _running = self.running
+        def _timer(state, *args):
+            if _running[0]:
+                return method(state, *args)
+            else:
+                pass
+            _running[0] = True
+            _start = STATS_CLOCK()
+            try:
+                _result = method(state, *args)
+            finally:
+                _running[0] = False
+            _times[kind] += STATS_CLOCK() - _start
+            _calls[kind] += 1
+            if count_passes and args[0][0] == -9: self.passes += 1
+            return _result
+        return _timer
+
+    def detach(self):
+        # Remove the timers from the search and collect its counters.
+        _search = self.search
+        if _search is None:
+            return self
+        else:
+            pass
+        self.total_time += STATS_CLOCK() - self.start_time
+        for _name in ['getActions', 'getLeafUtility', 'makeMove', 'unmakeMove', 'setResult']:
+            _search.__dict__.pop(_name, None)
+        _search.stats = None
+        self.search = None
+        self.depth = _search.depth_restriction
+        self.nodes = _search.nodes
+        self.nodes_per_depth = list(_search.nodes_per_depth)
+        self.cutoffs_per_depth = list(_search.cutoffs_per_depth)
+        self.researches = _search.researches
+        self.leaves = self.calls['evaluation']
+        if _search.transposition_table is not None:
+            self.transposition_table = _search.transposition_table.getStatistics()
+        else:
+            pass
+        return self
+
+    def setCutoff(self, index):
+        # Count a beta cutoff caused by the index-th move of a node.
+        while len(self.cutoff_indices) <= index:
+            self.cutoff_indices.append(0)
+        self.cutoff_indices[index] += 1
+
+    def getEffectiveBranchingFactor(self):
+        # Geometric mean of the growth of visited nodes from one depth to the next, down to the deepest visited depth.
+        _depth = len(self.nodes_per_depth) - 1
+        while _depth > 0 and self.nodes_per_depth[_depth] == 0:
+            _depth -= 1
+        if _depth == 0:
+            return 0.0
+        else:
+            return (float(self.nodes_per_depth[_depth]) / self.nodes_per_depth[0]) ** (1.0 / _depth)
+
+    def getStatistics(self):
+        _cutoffs = sum(self.cutoff_indices)
+        _times = dict(self.times)
+        _times['total'] = self.total_time
+        _times['other'] = max([0.0, self.total_time - sum(self.times.values())])
+        return {'algorithm': self.algorithm, 
+                'depth': self.depth, 
+                'nodes': self.nodes, 
+                'nodes_per_depth': self.nodes_per_depth, 
+                'cutoffs_per_depth': self.cutoffs_per_depth, 
+                'cutoff_indices': self.cutoff_indices, 
+                'first_move_cutoff_rate': float(self.cutoff_indices[0]) / _cutoffs if _cutoffs else 0.0, 
+                'leaves': self.leaves, 
+                'passes': self.passes, 
+                'researches': self.researches, 
+                'effective_branching_factor': self.getEffectiveBranchingFactor(), 
+                'times': _times, 
+                'calls': dict(self.calls), 
+                'transposition_table': self.transposition_table}
+
+    def writeJSON(self, fp):
+        json.dump(self.getStatistics(), fp, indent=2, sort_keys=True)
+        fp.write('\n')
+
+
 #
 # Main Class: Alpha-Beta Search Algorithm
 #    Alpha-Beta Search Algorithm implementation.
@@ -146,10 +791,17 @@ class AlphaBetaSearch(object):
     using the Alpha-Beta pruning algorithm with positional weight evaluation functions.
     '''
 
-    def __init__(self, initial_player="", depth=0, state=[[]]):
+    def __init__(self, initial_player="", depth=0, state=[[]], transposition_table=None, move_ordering=None, incremental_evaluation=False, trace_sink='list', config=None):
         '''
         Constructor
+            config: a GameConfig of board dimensions, weighting matrix and symbols, or None for the global variables.
+                    The transposition table and move ordering should be built with the same configuration.
+            transposition_table: a TranspositionTable shared between searches, or None to search without it.
+            move_ordering: a MoveOrdering, or None to search moves in row-major order.
+            incremental_evaluation: True will update the utility in makeMove/unmakeMove, so a leaf costs O(1).
+            trace_sink: kind of the traverse log in output_actions, 'list', 'file', 'binary' or None to drop it.
         '''
+        self.config = config if config is not None else DEFAULT_CONFIG
         self.depth_restriction = int(depth)
         self.state = state
         self.current_player = initial_player
@@ -158,7 +810,8 @@ class AlphaBetaSearch(object):
         self.utility = 0        
         self.action = ""
         self.current_depth = 0
-        self.output_actions = []
+        self.trace_sink = trace_sink
+        self.output_actions = getTraceSink(trace_sink, self.config)
         self.pass_count = 0
         self.i = -1
         self.j = -1
@@ -166,13 +819,34 @@ class AlphaBetaSearch(object):
         self.isGoDown = True
         self.next_state = list() #[next_status]
         self.max_value = float('-inf')
-        if initial_player == BLACK_SYMBLE :
-            self.min_player = WHITE_SYMBLE
+        self.transposition_table = transposition_table
+        self.hash_key = 0
+        self.nodes = 0 # Number of visited nodes.
+        self.deadline = None # Budget of iterative deepening.
+        self.node_limit = None
+        self.is_depth_cut = False # Any node stopped by depth_restriction in this search.
+        self.principal_variation = None # [[best line from depth 0], [best line from depth 1], ...] in iterative deepening.
+        self.pv_order = None # Best line of previous iteration which is searched first.
+        self.best_move = None # Root move (i, j) of the last completed iteration.
+        self.completed_depth = 0
+        self.move_ordering = move_ordering
+        self.nodes_per_depth = [] # Visited nodes and cutoffs on each depth of the last search.
+        self.cutoffs_per_depth = []
+        self.incremental_evaluation = incremental_evaluation
+        self.score = 0 # Utility of the current node when incremental_evaluation is True.
+        self.shared_alpha = None # Alpha bound of the root shared by parallel search processes.
+        self.researches = 0 # Searches repeated by PVS after a null window or the aspiration window fails.
+        self.stats = None # SearchStats attached to the search, or None.
+        self.disc_difference = None # Exact disc count of MAX minus MIN from the endgame solver of executePhaseSearch.
+        if initial_player == self.config.black_symbol :
+            self.min_player = self.config.white_symbol
         else :
-            self.min_player = BLACK_SYMBLE
+            self.min_player = self.config.black_symbol
             
         
     def executeSearch(self, state=[[]]):
+        # Return the minimax value and the next state recorded by setNextState, the output of the original program.
+        # best_move is the first best root move in search order, getNextState(state, best_move) is the board after it.
         v = 0
         _action = (-1, -1, 0, 0)
         _state = [[]]
@@ -183,10 +857,311 @@ class AlphaBetaSearch(object):
             _state = self.state
         a = NEGATIVE_INFINITE
         b = POSITIVE_INFINITE
+        _state = self.getSearchState(_state)
+        self.setSearchStatus(_state)
+        self.best_move = None
         
         v = self.getMaxValue(_state, a, b, 0)
         
+        self.next_state = self.getBoardState(self.next_state)
+        return v, self.next_state
+
+    def executeStatsSearch(self, state=[[]], algorithm=SEARCH_ALGORITHM):
+        # Run executeSearch, or executePVSearch with algorithm = 'pvs', with a SearchStats attached.
+        # Return the value, next state and the SearchStats of the search.
+        _stats = SearchStats()
+        _stats.attach(self, algorithm)
+        try:
+            if algorithm == 'pvs':
+                v, _next_state = self.executePVSearch(state)
+            else:
+                v, _next_state = self.executeSearch(state)
+        finally:
+            _stats.detach()
+        return v, _next_state, _stats
+
+    def getSearchState(self, state):
+        # Convert the list of lists board to the state representation of the board engine.
+        return state
+
+    def getBoardState(self, state):
+        # Convert a state of the board engine back to the list of lists board.
+        return state
+
+    def getStateHash(self, state):
+        return self.transposition_table.zobrist.getHash(state)
+
+    def setSearchStatus(self, state):
+        # Initialize hash key, incremental score and counters for a search from the state.
+        if self.transposition_table is not None:
+            self.transposition_table.newSearch()
+            self.hash_key = self.getStateHash(state)
+        if self.incremental_evaluation:
+            self.score = self.getUtility(state)
+        self.nodes_per_depth = [0] * (self.depth_restriction + 1)
+        self.cutoffs_per_depth = [0] * (self.depth_restriction + 1)
+
+    def executeParallelSearch(self, state=[[]], workers=PARALLEL_WORKERS):
+        # Root splitting with young brothers wait:
+        #    The eldest root move is searched first to get an alpha bound, 
+        #    then the other root moves are searched by a pool of worker processes which share the best alpha.
+        # A root move is searched with window (alpha - 1, Infinity), so a move as good as the best one still gets its exact value,
+        # and the chosen move is the first best move in search order, the same as the serial search.
+        # Return the value and getNextState of the best move: the value and best_move of executeSearch, 
+        # but not its next state, which is recorded by setNextState as in the original program. The traverse log is not produced.
+        if state != [[]]:
+            self.state = state
+        else:
+            pass
+        _state = self.getSearchState([list(_row) for _row in self.state])
+        self.setSearchStatus(_state)
+        self.current_player = self.max_player
+        actions = list(self.getActions(_state))
+        if self.move_ordering is not None: actions = self.orderActions(actions, 0, True)
+        if len(actions) < 2:
+            return self.executeSearch()
+        else:
+            pass
+        self.nodes = 1
+        self.nodes_per_depth[0] += 1
+        self.best_move = (actions[0][0], actions[0][1])
+        _next_state, _undo = self.makeMove(_state, actions[0])
+        v = self.getMinValue(_next_state, NEGATIVE_INFINITE, POSITIVE_INFINITE, 1)
+        self.unmakeMove(_next_state, _undo)
+        _values = {0: v}
+        _shared_alpha = multiprocessing.Value('d', v)
+        _options = (self.move_ordering.heuristics if self.move_ordering is not None else None, 
+                    self.transposition_table.size if self.transposition_table is not None else None, 
+                    self.incremental_evaluation, self.config)
+        _pool = multiprocessing.Pool(workers, setParallelWorker, (self.__class__, self.max_player, self.depth_restriction, self.state, _options, _shared_alpha))
+        try:
+            for _index, _v, _nodes in _pool.imap_unordered(getParallelRootValue, range(1, len(actions))):
+                _values[_index] = _v
+                self.nodes += _nodes
+        finally:
+            _pool.close()
+            _pool.join()
+        for _index in range(len(actions)):
+            if _values[_index] > v:
+                v = _values[_index]
+                self.best_move = (actions[_index][0], actions[_index][1])
+        self.output_actions = NullTraceSink()
+        self.next_state = self.getNextState(self.state, self.best_move)
+        return v, self.next_state
+
+    def executeRootMove(self, index, a=NEGATIVE_INFINITE):
+        # Search the index-th root move (in the order of the serial search) with window (a, Infinity) and return its value.
+        _state = self.getSearchState([list(_row) for _row in self.state])
+        self.setSearchStatus(_state)
+        self.current_player = self.max_player
+        actions = list(self.getActions(_state))
+        if self.move_ordering is not None: actions = self.orderActions(actions, 0, True)
+        _next_state, _undo = self.makeMove(_state, actions[index])
+        v = self.getMinValue(_next_state, a, POSITIVE_INFINITE, 1)
+        self.unmakeMove(_next_state, _undo)
+        return v
+
+    def executeIterativeSearch(self, state=[[]], time_limit=SEARCH_TIME_LIMIT, node_limit=SEARCH_NODE_LIMIT, max_depth=None, algorithm=SEARCH_ALGORITHM):
+        # Iterative deepening: search depth 1, 2, 3, ... until time_limit seconds or node_limit nodes are used.
+        # Each iteration searches the best line of the previous iteration first.
+        # With algorithm = 'pvs', each iteration is a PVS with the aspiration window around the value of the previous iteration.
+        # Return the value and next state of the best move from the last completed iteration.
+        v = 0
+        _next_state = list()
+        _output_actions = NullTraceSink()
+        _best_move = None # Each search resets best_move, so a stopped iteration would leave a partial one.
+        _depth = 0
+        if state != [[]]:
+            self.state = state
+        else:
+            pass
+        _state = self.state
+        self.nodes = 0
+        self.deadline = None if time_limit is None else time.time() + time_limit
+        self.node_limit = node_limit
+        self.pv_order = None
+        self.best_move = None
+        self.completed_depth = 0
+        while max_depth is None or _depth < max_depth:
+            _depth += 1
+            self.resetSearch(_depth)
+            self.principal_variation = [[] for _i in range(_depth + 2)]
+            try:
+                if algorithm == 'pvs':
+                    _v, _next_state_unused = self.executePVSearch([list(_row) for _row in _state], guess=v if self.completed_depth else None)
+                else:
+                    _v, _next_state_unused = self.executeSearch([list(_row) for _row in _state]) # A timeout may leave the copy half updated.
+            except SearchTimeout:
+                self.output_actions.close()
+                if DEBUG: print('Iterative deepening stops at depth %d after %d nodes'%(_depth, self.nodes))
+                break
+            v = _v
+            _output_actions.close()
+            _output_actions = self.output_actions
+            self.completed_depth = _depth
+            self.pv_order = self.principal_variation[0]
+            _best_move = self.pv_order[0] if self.pv_order else None
+            if DEBUG: print('Iterative deepening depth %d: value = %s, best line = %s'%(_depth, v, self.pv_order))
+            if not self.is_depth_cut: # The whole game tree has been searched.
+                break
+            else:
+                pass
+        self.deadline = None
+        self.node_limit = None
+        self.principal_variation = None
+        self.output_actions = _output_actions
+        self.state = _state
+        self.best_move = _best_move
+        if self.best_move is not None:
+            _next_state = self.getNextState(_state, self.best_move)
+        else:
+            pass
+        self.next_state = _next_state
+        return v, _next_state
+
+    def executePVSearch(self, state=[[]], window=ASPIRATION_WINDOW, guess=None):
+        # Principal Variation Search with an aspiration window at the root:
+        #    With a guessed value, e.g. the value of the previous iteration of iterative deepening, the root is searched with 
+        #    the window (guess - window, guess + window). When the value falls outside of the window, 
+        #    the failing side is widened 4 times and the root is searched again. Without a guess the root window is (-Infinity, Infinity).
+        # Return the value and getNextState of the best move, the same value and best_move as executeSearch: 
+        # the first best root move in search order is kept, since a later move only replaces it with a greater value. 
+        # The traverse log is not produced.
+        if state != [[]]:
+            self.state = state
+        else:
+            pass
+        _state = self.getSearchState([list(_row) for _row in self.state])
+        self.setSearchStatus(_state)
+        self.output_actions = NullTraceSink()
+        self.researches = 0
+        self.best_move = None
+        if guess is None:
+            a = NEGATIVE_INFINITE
+            b = POSITIVE_INFINITE
+        else:
+            a = guess - window
+            b = guess + window
+        _delta = window
+        while True:
+            v = self.getNegamaxValue(_state, a, b, 0, 1)
+            _delta *= 4
+            if v <= a:
+                a = v - _delta
+            elif v >= b:
+                b = v + _delta
+            else:
+                break
+            self.researches += 1
+            if DEBUG: print('Aspiration window fails with %s, search again with [%s, %s]'%(v, a, b))
+        self.next_state = self.getNextState(self.state, self.best_move)
+        return v, self.next_state
+
+    def executePhaseSearch(self, opening_book=None, endgame_empties=ENDGAME_EMPTIES):
+        # Answer the position without the depth limited search: 
+        #    from the opening book if it has the position, or by the exact endgame solver with endgame_empties empty cells or less.
+        #    The opening book is only used with the default game configuration it is built for.
+        # Return the value and next state, or None to run the normal search. The traverse log is not produced.
+        # The value is on the scale of getUtility: the value of the book entry, or the utility of the final board 
+        # of the exact best line. The exact disc count of MAX minus MIN is kept in disc_difference, None without the solver.
+        self.disc_difference = None
+        _player, _opponent = setBitboards(self.state, self.config)
+        if self.max_player != self.config.black_symbol:
+            _player, _opponent = _opponent, _player
+        else:
+            pass
+        if opening_book is not None and self.config is DEFAULT_CONFIG:
+            _entry = opening_book.probe(_player, _opponent)
+        else:
+            _entry = None
+        if _entry is not None:
+            v = _entry[2]
+            self.best_move = (_entry[0], _entry[1])
+            self.nodes = 0
+        elif self.config.m * self.config.n - getBitCount(_player | _opponent) <= endgame_empties:
+            _solver = EndgameSolver(ENDGAME_SORT_EMPTIES, self.config)
+            self.disc_difference, _move, _final = _solver.getBestLine(_player, _opponent)
+            if self.max_player != self.config.black_symbol:
+                _final = (_final[1], _final[0])
+            else:
+                pass
+            v = self.getUtility(self.getSearchState(getBoardFromBitboards(_final, self.state, self.config)))
+            if _move:
+                _index = _move.bit_length() - 1
+                self.best_move = (_index // self.config.n, _index % self.config.n)
+            else:
+                self.best_move = (-9, -9)
+            self.nodes = _solver.nodes
+        else:
+            return None
+        self.output_actions = NullTraceSink()
+        self.next_state = self.getNextState(self.state, self.best_move)
         return v, self.next_state
+
+    def resetSearch(self, depth):
+        # Clear the search status to run the search again with a new depth restriction.
+        self.depth_restriction = int(depth)
+        self.current_player = self.max_player
+        self.output_actions = getTraceSink(self.trace_sink, self.config)
+        self.pass_count = 0
+        self.i = -1
+        self.j = -1
+        self.isTreeEnd = False
+        self.isGoDown = True
+        self.next_state = list()
+        self.max_value = float('-inf')
+        self.is_depth_cut = False
+
+    def testBudget(self):
+        # Stop the search when the budget of iterative deepening runs out.
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchTimeout()
+        elif self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimeout()
+        else:
+            pass
+
+    def getHashKey(self, is_max):
+        # Zobrist hash of the current node = board + side to move + continuous passes.
+        _zobrist = self.transposition_table.zobrist
+        if is_max:
+            return self.hash_key ^ _zobrist.pass_keys[self.pass_count]
+        else:
+            return self.hash_key ^ _zobrist.side_key ^ _zobrist.pass_keys[self.pass_count]
+
+    def orderActions(self, actions, current_depth, is_max=True):
+        # Sort actions by move ordering heuristics. 
+        # Then search the move of the previous best line on this depth first.
+        if self.move_ordering is not None:
+            if self.transposition_table is not None:
+                _hash_move = self.transposition_table.getBestMove(self.getHashKey(is_max))
+            else:
+                _hash_move = None
+            actions = self.move_ordering.getOrderedActions(actions, current_depth, self.current_player, _hash_move)
+        else:
+            pass
+        if self.pv_order and current_depth < len(self.pv_order):
+            _move = self.pv_order[current_depth]
+            for _index, _action in enumerate(actions):
+                if (_action[0], _action[1]) == _move:
+                    actions.insert(0, actions.pop(_index))
+                    break
+        else:
+            pass
+        return actions
+
+    def getNextState(self, state, move):
+        # Apply the root move (i, j) of max player on a copy of state.
+        _state = [list(_row) for _row in state]
+        if move == (-9, -9):
+            return _state
+        else:
+            pass
+        self.current_player = self.max_player
+        for _action in self.getActions(_state):
+            if (_action[0], _action[1]) == move:
+                return self.setResult(_state, _action)
+        return _state
         
     def getMaxValue (self, state, a, b, depth):
         # Get Max Value
@@ -196,29 +1171,60 @@ class AlphaBetaSearch(object):
         actions = list()
         self.current_player = self.max_player
         self.isGoDown = True
+        self.nodes += 1
+        self.nodes_per_depth[current_depth] += 1
+        if (self.deadline is not None or self.node_limit is not None) and (self.nodes & 0xFF) == 0: self.testBudget()
+        if self.principal_variation is not None: self.principal_variation[current_depth] = []
         
         # Test Terminal conditions
-        if self.getTerminalTest(state, current_depth) == True :
+        # Valid moves are generated once, for both the terminal test and the expansion.
+        isTerminal, actions = self.getTerminalTest(state, current_depth)
+        if isTerminal == True :
             self.isTreeEnd = True
-            return self.getUtility(state)
+            return self.getLeafUtility(state)
         else:
             self.isTreeEnd = False
 
+        # Test Transposition Table. Nodes above depth 2 are always searched to record the next state.
+        if self.transposition_table is not None and current_depth > 1:
+            _key = self.getHashKey(True)
+            _value = self.transposition_table.probe(_key, self.depth_restriction - current_depth, a, b)
+            if _value is not None:
+                self.isTreeEnd = True
+                return _value
+            else:
+                _original_a = a
+                _best_move = None
+        else:
+            pass
+
         initial_v = POSITIVE_INFINITE        
         v = NEGATIVE_INFINITE 
-        actions = list(self.getActions(state))
+        if self.pv_order or self.move_ordering is not None: actions = self.orderActions(actions, current_depth, True)
         if (not actions and self.pass_count <= PASS2TERMINAL):   
             actions.append((-9, -9, ((0, 0))))        
-        for _action in actions:
+        for _index, _action in enumerate(actions):
             self.output_actions.append([parent_coordinates, current_depth, v, a, b]) #go down
             self.current_player = self.max_player
             _i = _action[0]
             _j = _action[1]
 
-            _v = self.getMinValue(self.setResult(state, _action), a, b, current_depth + 1)            
+            _next_state, _undo = self.makeMove(state, _action)
+            _v = self.getMinValue(_next_state, a, b, current_depth + 1)
+            self.unmakeMove(_next_state, _undo)
+            if self.transposition_table is not None and current_depth > 1 and _v > v: _best_move = (_i, _j)
+            if self.principal_variation is not None and _v > v: 
+                self.principal_variation[current_depth] = [(_i, _j)] + self.principal_variation[current_depth + 1]
+            if current_depth == 0 and _v > v: self.best_move = (_i, _j)
             v = max([v, _v])           
             if v >= b:
                 if DEBUG == True: print('[v, a, b]= %f, %f, %f'%(v,a,b))   
+                self.cutoffs_per_depth[current_depth] += 1
+                if self.stats is not None: self.stats.setCutoff(_index)
+                if self.move_ordering is not None: 
+                    self.move_ordering.setCutoff((_i, _j), current_depth, self.depth_restriction - current_depth, self.max_player)
+                if self.transposition_table is not None and current_depth > 1: 
+                    self.transposition_table.store(_key, self.depth_restriction - current_depth, v, TT_LOWERBOUND, _best_move)
                 coordinates = self.getCoordinates(_i, _j)
                 if (self.isGoDown):
                     if (self.isTreeEnd):   
@@ -244,6 +1250,9 @@ class AlphaBetaSearch(object):
                         self.output_actions.append([coordinates, current_depth + 1, initial_v, a, b])
                 else:     
                     a = max([a, v])  
+        if self.transposition_table is not None and current_depth > 1: 
+            self.transposition_table.store(_key, self.depth_restriction - current_depth, v, 
+                                           TT_UPPERBOUND if v <= _original_a else TT_EXACT, _best_move)
         self.output_actions.append([parent_coordinates, current_depth, v, a, b]) 
         if DEBUG == True: print('[v, a, b]= %f, %f, %f'%(v,a,b))   
         return v
@@ -256,30 +1265,61 @@ class AlphaBetaSearch(object):
         actions = list()
         self.current_player = self.min_player
         self.isGoDown = True
-        if self.getTerminalTest(state, current_depth) == True :
+        self.nodes += 1
+        self.nodes_per_depth[current_depth] += 1
+        if (self.deadline is not None or self.node_limit is not None) and (self.nodes & 0xFF) == 0: self.testBudget()
+        if self.principal_variation is not None: self.principal_variation[current_depth] = []
+        isTerminal, actions = self.getTerminalTest(state, current_depth)
+        if isTerminal == True :
             self.isTreeEnd = True
-            if current_depth == 1: self.setNextState(self.getUtility(state), state) # New add code: Record down the best move            
-            return self.getUtility(state)
+            v = self.getLeafUtility(state)
+            if current_depth == 1: self.setNextState(v, state) # New add code: Record down the best move            
+            return v
         else:
             self.isTreeEnd = False
+
+        # Test Transposition Table. Nodes above depth 2 are always searched to record the next state.
+        if self.transposition_table is not None and current_depth > 1:
+            _key = self.getHashKey(False)
+            _value = self.transposition_table.probe(_key, self.depth_restriction - current_depth, a, b)
+            if _value is not None:
+                self.isTreeEnd = True
+                return _value
+            else:
+                _original_b = b
+                _best_move = None
+        else:
+            pass
             
         initial_v = POSITIVE_INFINITE
         v = POSITIVE_INFINITE
-        actions = list(self.getActions(state))
+        if self.pv_order or self.move_ordering is not None: actions = self.orderActions(actions, current_depth, False)
         if (not actions and self.pass_count <= PASS2TERMINAL):   
             actions.append((-9, -9, ((0, 0))))       
-        for _action in actions:
+        for _index, _action in enumerate(actions):
+            if self.shared_alpha is not None and current_depth == 1: a = max([a, self.shared_alpha.value - 1]) # Alpha improved by other processes.
             self.output_actions.append([parent_coordinates, current_depth, v, a, b]) #go down
             self.current_player = self.min_player 
             _i = _action[0]
             _j = _action[1]
         
-            _v = self.getMaxValue(self.setResult(state, _action) , a, b, current_depth + 1)
+            _next_state, _undo = self.makeMove(state, _action)
+            _v = self.getMaxValue(_next_state, a, b, current_depth + 1)
+            self.unmakeMove(_next_state, _undo)
             # Record down the best move
             if current_depth == 1: self.setNextState(_v, state)         
+            if self.transposition_table is not None and current_depth > 1 and _v < v: _best_move = (_i, _j)
+            if self.principal_variation is not None and _v < v: 
+                self.principal_variation[current_depth] = [(_i, _j)] + self.principal_variation[current_depth + 1]
             v = min([v, _v])
             if v <= a:
                 if DEBUG == True: print('[v, a, b]= %f, %f, %f'%(v,a,b))
+                self.cutoffs_per_depth[current_depth] += 1
+                if self.stats is not None: self.stats.setCutoff(_index)
+                if self.move_ordering is not None: 
+                    self.move_ordering.setCutoff((_i, _j), current_depth, self.depth_restriction - current_depth, self.min_player)
+                if self.transposition_table is not None and current_depth > 1: 
+                    self.transposition_table.store(_key, self.depth_restriction - current_depth, v, TT_UPPERBOUND, _best_move)
                 coordinates = self.getCoordinates(_i, _j)   
                 if (self.isGoDown): 
                     if (self.isTreeEnd):   
@@ -305,47 +1345,145 @@ class AlphaBetaSearch(object):
                         self.output_actions.append([coordinates, current_depth + 1, initial_v, a, b])
                 else:     
                     b = min([b, v])               
+        if self.transposition_table is not None and current_depth > 1: 
+            self.transposition_table.store(_key, self.depth_restriction - current_depth, v, 
+                                           TT_LOWERBOUND if v >= _original_b else TT_EXACT, _best_move)
         self.output_actions.append([parent_coordinates, current_depth, v, a, b]) #Parent node
         if DEBUG == True: print('[v, a, b]= %f, %f, %f'%(v,a,b))   
         return v
 
-    def getUtility (self, state):
-        # Based on weight matrix and current state to calculate utility
-        #
-        value = 0
-        _max = 0
-        _min = 0
-        
-        for i, row in enumerate(state):
-            for j, cell in enumerate(row):
-                if cell == self.min_player:
-                    _min += WEIGHT_MATRIX[i][j]
-                elif cell == self.max_player:
-                    _max += WEIGHT_MATRIX[i][j]
-                else:
-                    pass
-        value = _max - _min
+    def getNegamaxValue (self, state, a, b, depth, color):
+        # Principal Variation Search in negamax form.
+        #    color = 1 when MAX is to move and -1 when MIN is to move. The value is seen by the player to move, i.e. color * utility.
+        #    The first move is searched with the window (a, b), the others with the null window (a, a + 1) to prove they are not better,
+        #    and a move which fails high is searched again with the window (value, b). Utilities are integers, so a null window has width 1.
+        current_depth = depth
+        is_max = color > 0
+        self.current_player = self.max_player if is_max else self.min_player
+        self.nodes += 1
+        self.nodes_per_depth[current_depth] += 1
+        if (self.deadline is not None or self.node_limit is not None) and (self.nodes & 0xFF) == 0: self.testBudget()
+        if self.principal_variation is not None: self.principal_variation[current_depth] = []
+
+        isTerminal, actions = self.getTerminalTest(state, current_depth)
+        if isTerminal == True :
+            return color * self.getLeafUtility(state)
+        else:
+            pass
+
+        # The transposition table keeps values and bounds seen by MAX.
+        if self.transposition_table is not None and current_depth > 1:
+            _key = self.getHashKey(is_max)
+            if is_max:
+                _value = self.transposition_table.probe(_key, self.depth_restriction - current_depth, a, b)
+            else:
+                _value = self.transposition_table.probe(_key, self.depth_restriction - current_depth, -b, -a)
+            if _value is not None:
+                return color * _value
+            else:
+                _original_a = a
+                _best_move = None
+        else:
+            pass
+
+        v = NEGATIVE_INFINITE
+        if self.pv_order or self.move_ordering is not None: actions = self.orderActions(actions, current_depth, is_max)
+        if (not actions and self.pass_count <= PASS2TERMINAL):
+            actions.append((-9, -9, ((0, 0))))
+        for _index, _action in enumerate(actions):
+            self.current_player = self.max_player if is_max else self.min_player
+            _next_state, _undo = self.makeMove(state, _action)
+            if _index == 0:
+                _v = -self.getNegamaxValue(_next_state, -b, -a, current_depth + 1, -color)
+            else:
+                _v = -self.getNegamaxValue(_next_state, -a - 1, -a, current_depth + 1, -color)
+                if a < _v < b:
+                    self.researches += 1
+                    _v = -self.getNegamaxValue(_next_state, -b, -_v, current_depth + 1, -color)
+                else:
+                    pass
+            self.unmakeMove(_next_state, _undo)
+            if _v > v:
+                v = _v
+                if current_depth == 0: self.best_move = (_action[0], _action[1])
+                if self.principal_variation is not None: 
+                    self.principal_variation[current_depth] = [(_action[0], _action[1])] + self.principal_variation[current_depth + 1]
+                if self.transposition_table is not None and current_depth > 1: _best_move = (_action[0], _action[1])
+            else:
+                pass
+            a = max([a, v])
+            if a >= b:
+                self.cutoffs_per_depth[current_depth] += 1
+                if self.stats is not None: self.stats.setCutoff(_index)
+                if self.move_ordering is not None:
+                    self.move_ordering.setCutoff((_action[0], _action[1]), current_depth, self.depth_restriction - current_depth, self.current_player)
+                break
+            else:
+                pass
+        if self.transposition_table is not None and current_depth > 1:
+            if v >= b:
+                _bound = TT_LOWERBOUND if is_max else TT_UPPERBOUND
+            elif v <= _original_a:
+                _bound = TT_UPPERBOUND if is_max else TT_LOWERBOUND
+            else:
+                _bound = TT_EXACT
+            self.transposition_table.store(_key, self.depth_restriction - current_depth, color * v, _bound, _best_move)
+        else:
+            pass
+        return v
+
+    def getUtility (self, state):
+        # Based on weight matrix and current state to calculate utility
+        #
+        value = 0
+        _max = 0
+        _min = 0
+        
+        for i, row in enumerate(state):
+            for j, cell in enumerate(row):
+                if cell == self.min_player:
+                    _min += self.config.weight_matrix[i][j]
+                elif cell == self.max_player:
+                    _max += self.config.weight_matrix[i][j]
+                else:
+                    pass
+        value = _max - _min
         return value
+
+    def getLeafUtility (self, state):
+        # Utility of a leaf node, from the incremental score if it is maintained.
+        if self.incremental_evaluation:
+            return self.score
+        else:
+            return self.getUtility(state)
         
     def getTerminalTest (self, state, current_depth):
         # Test Termination condition
         # Either tree depth reach the restriction or no more action can be considered.
+        # self.pass_count counts the continuous passes of the nodes tested in search order, as in the original program, 
+        # so the output is the same. Its value can carry over from a sibling sub tree, so in positions with passes 
+        # in the tree the values depend on the search order (see README).
+        # Return isTerminal and the valid actions of this node, which are reused to expand it.
         isTerminal = False
+        actions = list()
         
         if (self.depth_restriction <= current_depth):
             isTerminal = True
-        elif (not self.getActions(state)): #empty list
-            self.i = -9
-            self.j = -9
-            self.pass_count += 1
-            if (self.pass_count > PASS2TERMINAL):
-                isTerminal = True
-            else:
-                pass
+            self.is_depth_cut = True
         else:
-            self.pass_count = 0
+            actions = self.getActions(state)
+            if (not actions): #empty list
+                self.i = -9
+                self.j = -9
+                self.pass_count += 1
+                if (self.pass_count > PASS2TERMINAL):
+                    isTerminal = True
+                else:
+                    pass
+            else:
+                self.pass_count = 0
 
-        return isTerminal
+        return isTerminal, actions
         
     def setResult (self, state, action):
         # Based on action to transfer current state to next state.
@@ -353,10 +1491,10 @@ class AlphaBetaSearch(object):
         next_state = copy.deepcopy(state) #create a new state
         player = ""
         player = self.current_player
-        if (player == BLACK_SYMBLE) :
-            opponent = WHITE_SYMBLE
+        if (player == self.config.black_symbol) :
+            opponent = self.config.white_symbol
         else :
-            opponent = BLACK_SYMBLE        
+            opponent = self.config.black_symbol        
         i = action[0]
         j = action[1]
         self.i = i
@@ -368,58 +1506,79 @@ class AlphaBetaSearch(object):
             pass
         # Place piece
         next_state[i][j] = player
-                            
+        _rays = self.config.ray_table[i][j]
         for _direction in action[2]:
-            increase_i = _direction[0]
-            increase_j = _direction[1]
-            x = 0
-            y = 0
-            row_bound = 0
-            column_bound = 0
-            
-            if increase_i > 0: row_bound = M
-            elif increase_i < 0: row_bound = -1
-            else: row_bound = i + 1
-                
-            if increase_j > 0: column_bound = N
-            elif increase_j < 0: column_bound = -1
-            else:   column_bound = j + 1        
-        
-            #Get neighbor's coordinates.
-            x = i+increase_i
-            y = j+increase_j
-                  
-            # Flip pieces or D1 and D5 direction.
-            if (increase_i != 0 and increase_j == 0):
-                for i1 in range(x, row_bound, increase_i) :
-                    if (state[i1][y] == opponent):
-                        next_state[i1][y] = player
-                    elif (state[i1][y] == player):
-                        break
-                    else:
-                        break 
-            # Flip pieces on D3 or D7 direction.
-            elif (increase_i == 0 and increase_j != 0):
-                for j1 in range(y, column_bound, increase_j) :
-                    if (state[x][j1] == opponent):
-                        next_state[x][j1] = player
-                    elif (state[x][j1] == player):
-                        break
-                    else:
-                        break      
-            # Flip pieces on D2, D4, D6, or D8 direction
-            elif (increase_i !=0 and increase_j != 0):
-                for i1, j1 in zip (range(x, row_bound, increase_i), range (y, column_bound, increase_j)):
-                    if (state[i1][j1] == opponent):
-                        next_state[i1][j1] = player
-                    elif (state[i1][j1] == player):
-                        break
-                    else:
-                        break                 
-            else:
-                pass                
+            # Flip continuous opponent pieces on the direction.
+            for x, y in _rays[DIRECTION_INDEX[_direction]]:
+                if (state[x][y] == opponent):
+                    next_state[x][y] = player
+                else:
+                    break
         if DEBUG : print ('Next state = %s'%next_state)
         return next_state
+
+    def makeMove (self, state, action):
+        # Apply action on the state in place instead of copying the board.
+        # Return the state and an undo record = (i, j, original cell, opponent, [flipped cells], hash key, score) for unmakeMove.
+        player = self.current_player
+        if (player == self.config.black_symbol) :
+            opponent = self.config.white_symbol
+        else :
+            opponent = self.config.black_symbol
+        i = action[0]
+        j = action[1]
+        self.i = i
+        self.j = j
+
+        if (i == -9 and j == -9):
+            return state, None
+        else :
+            pass
+        flipped = list()
+        _rays = self.config.ray_table[i][j]
+        for _direction in action[2]:
+            for x, y in _rays[DIRECTION_INDEX[_direction]]:
+                if state[x][y] == opponent:
+                    flipped.append((x, y))
+                else:
+                    break
+        undo = (i, j, state[i][j], opponent, flipped, self.hash_key, self.score)
+        # Place piece and flip pieces
+        state[i][j] = player
+        for x, y in flipped:
+            state[x][y] = player
+        if self.transposition_table is not None:
+            _keys = self.transposition_table.zobrist.keys
+            self.hash_key ^= _keys[player][i * self.config.n + j]
+            for x, y in flipped:
+                self.hash_key ^= _keys[player][x * self.config.n + y] ^ _keys[opponent][x * self.config.n + y]
+        else:
+            pass
+        if self.incremental_evaluation:
+            # The placed piece adds its weight, a flipped piece moves its weight from opponent to player.
+            _delta = self.config.weight_matrix[i][j]
+            for x, y in flipped:
+                _delta += 2 * self.config.weight_matrix[x][y]
+            if player == self.max_player:
+                self.score += _delta
+            else:
+                self.score -= _delta
+        else:
+            pass
+        if DEBUG : print ('Next state = %s'%state)
+        return state, undo
+
+    def unmakeMove (self, state, undo):
+        # Reverse the changes recorded by makeMove.
+        if undo is None:
+            return state
+        else:
+            pass
+        i, j, cell, opponent, flipped, self.hash_key, self.score = undo
+        state[i][j] = cell
+        for x, y in flipped:
+            state[x][y] = opponent
+        return state
         
     def getActions (self, state):
         # Get next valid action from exist state
@@ -433,52 +1592,33 @@ class AlphaBetaSearch(object):
 
         actions = list()
         directions = list()
-        palyer = ""
-        opponent = ""
-        valid = False
         player = self.current_player
+        if (player == self.config.black_symbol) :
+            opponent = self.config.white_symbol
+        else :
+            opponent = self.config.black_symbol
 
         for i, row in enumerate(state):
+            _ray_row = self.config.ray_table[i]
             for j, cell in enumerate(row):
                 # Investigate this cell is a valid move by 8 directions.
-                if(state[i][j] != BLACK_SYMBLE and state[i][j] != WHITE_SYMBLE): #The cell should be empty
-                    # Neighbor in D1=(i-1,j)
-                    if self.getValidMove(state, i, j, -1, 0) :
-                        directions.append((-1, 0))
-                        valid = True       
-                    #Neighbor in D2=(i-1,j+1)
-                    if self.getValidMove(state, i, j, -1, 1):
-                        directions.append((-1, 1))
-                        valid = True        
-                    #Neighbor in D3=(i,j+1)
-                    if self.getValidMove(state, i, j, 0, 1):
-                        directions.append((0, 1))
-                        valid = True 
-                    #Neighbor in D4=(i+1, j+1)
-                    if self.getValidMove(state, i, j, 1, 1):
-                        directions.append((1, 1))
-                        valid = True 
-                    #Neighbor in D5(i+1, j)
-                    if self.getValidMove(state, i, j, 1, 0):
-                        directions.append((1, 0))
-                        valid = True 
-                    #Neighbor in D6=(i+1, j-1)
-                    if self.getValidMove(state, i, j, 1, -1):
-                        directions.append((1, -1))
-                        valid = True 
-                    #Neighbor in D7=(i, j-1)
-                    if self.getValidMove(state, i, j, 0, -1):
-                        directions.append((0, -1))
-                        valid = True 
-                    #Neighbor in D8=(i-1,j-1) 
-                    if self.getValidMove(state, i, j, -1, -1):
-                        directions.append((-1, -1)) 
-                        valid = True                               
-                    if valid :
+                if(cell != player and cell != opponent): #The cell should be empty
+                    for _k, _ray in enumerate(_ray_row[j]):
+                        # Neighbor is opponent, and continuous opponent pieces end with a player piece.
+                        if len(_ray) > 1 and state[_ray[0][0]][_ray[0][1]] == opponent:
+                            for x, y in _ray:
+                                if state[x][y] == opponent:
+                                    pass
+                                elif state[x][y] == player:
+                                    directions.append(DIRECTIONS[_k])
+                                    break
+                                else:
+                                    break
+                        else:
+                            pass
+                    if directions :
                         actions.append((i, j, directions))
-                        valid = False
                         directions = list()
-                    
                 else:
                     pass
         if DEBUG : print ('Player=%s, actions = [%s]'%(player, actions))
@@ -491,64 +1631,24 @@ class AlphaBetaSearch(object):
         # Direct D1 = upper, D2 = upper right, D3 = right, D4 = bottom right, D5 = bottom, D6 = bottom left, D7 = left, D8 = upper left. 
         # For an MXN array, cell (i, j) have to test neighbor cells: D1=(i-1,j), D2=(i-1,j+1), D3=(i,j+1), D4=(i+1, j+1), D5(i+1, j), D6=(i+1, j-1), D7=(i, j-1), D8=(i-1,j-1) 
         # If neighbor cell is opposite piece, then we have to test same direction to test continuous opposite pieces until a same piece.
-        palyer = ""
-        opponent = ""
         isValid = False
-        x = 0
-        y = 0
-        row_bound = 0
-        column_bound = 0
         player = self.current_player
-        if (player == BLACK_SYMBLE) :
-            opponent = WHITE_SYMBLE
+        if (player == self.config.black_symbol) :
+            opponent = self.config.white_symbol
         else :
-            opponent = BLACK_SYMBLE
-        #Get neighbor's coordinates.
-        x = i+increase_i
-        y = j+increase_j
+            opponent = self.config.black_symbol
+        _ray = self.config.ray_table[i][j][DIRECTION_INDEX[(increase_i, increase_j)]]
         #Neighbor is opponent.
-        if (x >=0 and x < M and y >=0 and y < N and state[x][y] == opponent):
+        if (_ray and state[_ray[0][0]][_ray[0][1]] == opponent):
             if DEBUG : print ('i,j = %d, %d has an opponent neighbor'%(i, j))
-            if increase_i > 0: row_bound = M
-            elif increase_i < 0: row_bound = -1
-            else: row_bound = i + 1
-                
-            if increase_j > 0: column_bound = N
-            elif increase_j < 0: column_bound = -1
-            else:   column_bound = j + 1
-
-            # Move to D1 or D5
-            if (increase_i != 0 and increase_j == 0):
-                for i1 in range(x, row_bound, increase_i) :
-                    if (state[i1][y] == opponent):
-                        pass
-                    elif (state[i1][y] == player):
-                        isValid = True
-                        break
-                    else:
-                        break 
-            # Move to D3, 7
-            elif (increase_i == 0 and increase_j != 0):
-                for j1 in range(y, column_bound, increase_j) :
-                    if (state[x][j1] == opponent):
-                        pass
-                    elif (state[x][j1] == player):
-                        isValid = True
-                        break
-                    else:
-                        break      
-            # Move to D2, D4, D6, D8         
-            elif (increase_i !=0 and increase_j != 0):
-                for i1, j1 in zip (range(x, row_bound, increase_i), range (y, column_bound, increase_j)):
-                    if (state[i1][j1] == opponent):
-                        pass
-                    elif (state[i1][j1] == player):
-                        isValid = True
-                        break
-                    else:
-                        break                 
-            else:
-                pass                
+            for x, y in _ray:
+                if (state[x][y] == opponent):
+                    pass
+                elif (state[x][y] == player):
+                    isValid = True
+                    break
+                else:
+                    break
         else:
             pass    
         return isValid
@@ -562,16 +1662,945 @@ class AlphaBetaSearch(object):
         elif (i == -9 and j == -9):
             return 'pass'
         else:
-            coordinates = NUMBER2ALPHABET.get(j+1, None) + str(i+1) 
+            coordinates = self.config.labels[i][j]
         
         return coordinates
     
     def setNextState (self, value, next_state):
         # put next step into memory    
+        # The board is updated in place by makeMove/unmakeMove, so keep a copy of the rows.
+        if (self.max_value < value):
+            self.next_state = [list(_row) for _row in next_state]
+            self.max_value = value
+
+
+#
+# Bitboard helpers: each side of an 8x8 board is kept in a 64-bit integer.
+#    Cell (i, j) maps to bit i*N + j, so ascending bit order equals the row-major scan order of getActions.
+#
+# The bitboard tables of a board are built by its GameConfig. Those of the default game:
+BITBOARD_FULL = DEFAULT_CONFIG.bitboard_full
+BITBOARD_NOT_FIRST_COLUMN = DEFAULT_CONFIG.not_first_column # Clear column a after a shift to the right.
+BITBOARD_NOT_LAST_COLUMN = DEFAULT_CONFIG.not_last_column # Clear column h after a shift to the left.
+# Direction (increase_i, increase_j) in the same D1..D8 order as getActions.
+BITBOARD_DIRECTIONS = DIRECTIONS
+# Weight sum of the 8 cells of a row for every 8-bit occupancy pattern, one table per row.
+BITBOARD_ROW_WEIGHTS = DEFAULT_CONFIG.row_weights
+
+def getBitboardShift(bitboard, direction, config=DEFAULT_CONFIG):
+    # Move every piece of the bitboard one cell toward the direction, pieces leaving the board are dropped.
+    return config.getBitboardShift(bitboard, direction)
+
+# (shift, mask) pairs of the directions moving toward higher bits and toward lower bits.
+# The mask removes pieces which wrap around to the other side of the board.
+BITBOARD_LEFT_SHIFTS = DEFAULT_CONFIG.left_shifts
+BITBOARD_RIGHT_SHIFTS = DEFAULT_CONFIG.right_shifts
+
+def getBitboardMoves(player, opponent, config=DEFAULT_CONFIG):
+    # Get all valid moves of player as a bitboard.
+    # For each direction, spread player's pieces over continuous opponent pieces, the next empty cell is a valid move.
+    _empty = ~(player | opponent) & config.bitboard_full
+    _moves = 0
+    for _shift, _mask in config.left_shifts:
+        _opponent = opponent & _mask
+        _x = (player << _shift) & _opponent
+        _x |= (_x << _shift) & _opponent
+        _x |= (_x << _shift) & _opponent
+        _x |= (_x << _shift) & _opponent
+        _x |= (_x << _shift) & _opponent
+        _x |= (_x << _shift) & _opponent
+        for _step in config.extra_spreads:
+            _x |= (_x << _shift) & _opponent
+        _moves |= (_x << _shift) & _empty & _mask
+    for _shift, _mask in config.right_shifts:
+        _opponent = opponent & _mask
+        _x = (player >> _shift) & _opponent
+        _x |= (_x >> _shift) & _opponent
+        _x |= (_x >> _shift) & _opponent
+        _x |= (_x >> _shift) & _opponent
+        _x |= (_x >> _shift) & _opponent
+        _x |= (_x >> _shift) & _opponent
+        for _step in config.extra_spreads:
+            _x |= (_x >> _shift) & _opponent
+        _moves |= (_x >> _shift) & _empty & _mask
+    return _moves
+
+def getBitboardFlips(player, opponent, move, config=DEFAULT_CONFIG):
+    # Get opponent pieces which will be flipped when player places a piece on the move bit.
+    _flips = 0
+    for _shift, _mask in config.left_shifts:
+        _line = 0
+        _x = (move << _shift) & _mask
+        while _x & opponent:
+            _line |= _x
+            _x = (_x << _shift) & _mask
+        if _x & player:
+            _flips |= _line
+    for _shift, _mask in config.right_shifts:
+        _line = 0
+        _x = (move >> _shift) & _mask
+        while _x & opponent:
+            _line |= _x
+            _x = (_x >> _shift) & _mask
+        if _x & player:
+            _flips |= _line
+    return _flips
+
+def getBitboardWeight(bitboard, config=DEFAULT_CONFIG):
+    # Sum of the weighting matrix over all pieces on the bitboard by one table lookup per row.
+    _value = 0
+    _row_mask = config.row_mask
+    _n = config.n
+    for i, _row_weights in enumerate(config.row_weights):
+        _value += _row_weights[(bitboard >> (i * _n)) & _row_mask]
+    return _value
+
+def setBitboards(state, config=DEFAULT_CONFIG):
+    # Convert a list of lists board to (black bitboard, white bitboard).
+    _black = 0
+    _white = 0
+    for i, row in enumerate(state):
+        for j, cell in enumerate(row):
+            if cell == config.black_symbol:
+                _black |= 1 << (i * config.n + j)
+            elif cell == config.white_symbol:
+                _white |= 1 << (i * config.n + j)
+            else:
+                pass
+    return (_black, _white)
+
+def getBoardFromBitboards(bitboards, template, config=DEFAULT_CONFIG):
+    # Convert (black bitboard, white bitboard) back to a list of lists board.
+    # Empty cells keep the symbol of the template board.
+    _state = [list(_row) for _row in template]
+    for i, row in enumerate(_state):
+        for j in range(len(row)):
+            _bit = 1 << (i * config.n + j)
+            if bitboards[0] & _bit:
+                row[j] = config.black_symbol
+            elif bitboards[1] & _bit:
+                row[j] = config.white_symbol
+            else:
+                pass
+    return _state
+
+
+#
+# Bitboard Alpha-Beta Search Algorithm
+#    Same search, evaluation and traverse log as AlphaBetaSearch, 
+#    but the state is a (black bitboard, white bitboard) tuple and moves are generated by shift-and-mask operations.
+#
+
+class BitboardAlphaBetaSearch(AlphaBetaSearch):
+    '''
+    This class runs the Alpha-Beta search of AlphaBetaSearch on a bitboard engine.
+    Only the board operations are replaced, so the minimax value, next state and output_actions are identical.
+    '''
+
+    def getSearchState(self, state):
+        return setBitboards(state, self.config)
+
+    def getBoardState(self, state):
+        # Bitboards of the next state are converted back with the empty cells of the input board.
+        if isinstance(state, tuple):
+            return getBoardFromBitboards(state, self.state, self.config)
+        else:
+            return state
+
+    def getStateHash(self, state):
+        return self.transposition_table.zobrist.getBitboardHash(state)
+
+    def getNextState(self, state, move):
+        # Apply the root move (i, j) of max player on a copy of the list of lists state.
+        _bitboards = setBitboards(state, self.config)
+        self.current_player = self.max_player
+        for _action in self.getActions(_bitboards):
+            if (_action[0], _action[1]) == move:
+                _bitboards = self.setResult(_bitboards, _action)
+                break
+        return getBoardFromBitboards(_bitboards, state, self.config)
+
+    def getPlayerBitboards(self, state):
+        # Return (current player bitboard, opponent bitboard).
+        if self.current_player == self.config.black_symbol:
+            return state[0], state[1]
+        else:
+            return state[1], state[0]
+
+    def getUtility (self, state):
+        # Based on weight matrix and current state to calculate utility
+        #
+        if self.max_player == self.config.black_symbol:
+            return getBitboardWeight(state[0], self.config) - getBitboardWeight(state[1], self.config)
+        else:
+            return getBitboardWeight(state[1], self.config) - getBitboardWeight(state[0], self.config)
+
+    def setResult (self, state, action):
+        # Based on action to transfer current state to next state.
+        # action = (i, j, flips bitboard)
+        i = action[0]
+        j = action[1]
+        self.i = i
+        self.j = j
+
+        if (self.i == -9 and self.j == -9):
+            return state
+        else :
+            pass
+        _player, _opponent = self.getPlayerBitboards(state)
+        _changes = action[2] | (1 << (i * self.config.n + j))
+        _player |= _changes
+        _opponent &= ~_changes
+        if self.current_player == self.config.black_symbol:
+            next_state = (_player, _opponent)
+        else:
+            next_state = (_opponent, _player)
+        if DEBUG : print ('Next state = %s'%(next_state,))
+        return next_state
+
+    def makeMove (self, state, action):
+        # Bitboards are immutable integers, the next state is built without copying. 
+        # Only the hash key and the incremental score have to be undone.
+        if action[0] == -9 or (self.transposition_table is None and not self.incremental_evaluation):
+            return self.setResult(state, action), None
+        else:
+            _undo = (self.hash_key, self.score)
+        if self.incremental_evaluation:
+            _delta = self.config.weight_matrix[action[0]][action[1]] + 2 * getBitboardWeight(action[2], self.config)
+            if self.current_player == self.max_player:
+                self.score += _delta
+            else:
+                self.score -= _delta
+        else:
+            pass
+        if self.transposition_table is not None:
+            _keys = self.transposition_table.zobrist.keys
+            _player_keys = _keys[self.current_player]
+            _opponent_keys = _keys[self.min_player if self.current_player == self.max_player else self.max_player]
+            self.hash_key ^= _player_keys[action[0] * self.config.n + action[1]]
+            _flips = action[2]
+            while _flips:
+                _bit = _flips & -_flips
+                _flips ^= _bit
+                _index = _bit.bit_length() - 1
+                self.hash_key ^= _player_keys[_index] ^ _opponent_keys[_index]
+        else:
+            pass
+        return self.setResult(state, action), _undo
+
+    def unmakeMove (self, state, undo):
+        if undo is not None:
+            self.hash_key, self.score = undo
+        else:
+            pass
+        return state
+
+    def getActions (self, state):
+        # Get next valid action from exist state
+        # actions = [(i1, j1, flips bitboard), ... , (ik, jk, flips bitboard)] in row-major order.
+        actions = list()
+        _player, _opponent = self.getPlayerBitboards(state)
+        _n = self.config.n
+        _moves = getBitboardMoves(_player, _opponent, self.config)
+        while _moves:
+            _move = _moves & -_moves
+            _moves ^= _move
+            _index = _move.bit_length() - 1
+            actions.append((_index // _n, _index % _n, getBitboardFlips(_player, _opponent, _move, self.config)))
+        if DEBUG : print ('Player=%s, actions = [%s]'%(self.current_player, actions))
+
+        return actions
+
+    def setNextState (self, value, next_state):
+        # put next step into memory. Bitboards are immutable and converted back to a board in executeSearch.
         if (self.max_value < value):
-            self.next_state = copy.deepcopy(next_state)
+            self.next_state = next_state
             self.max_value = value
-       
+
+
+#
+# Opening book and endgame solver
+#    OpeningBook answers early positions by a memory-mapped table of precomputed best moves,
+#    EndgameSolver searches late positions to the end of the game and scores them by disc count.
+#
+
+def getSymmetryTables(m=M, n=N):
+#
+# Index permutations of the 8 symmetries of a square board: 4 rotations, each with and without a mirror.
+#  symmetry_tables[k][i * n + j] = index of cell (i, j) after the k-th symmetry.
+#
+    _last = n - 1
+    _transforms = [lambda i, j: (i, j), lambda i, j: (j, _last - i), lambda i, j: (_last - i, _last - j), lambda i, j: (_last - j, i),
+                   lambda i, j: (i, _last - j), lambda i, j: (_last - i, j), lambda i, j: (j, i), lambda i, j: (_last - j, _last - i)]
+    _tables = []
+    for _transform in _transforms:
+        _table = [0] * (m * n)
+        for i in range(m):
+            for j in range(n):
+                x, y = _transform(i, j)
+                _table[i * n + j] = x * n + y
+        _tables.append(_table)
+    return _tables
+
+BOOK_SYMMETRIES = getSymmetryTables(M, N)
+BOOK_INVERSE_SYMMETRIES = [[_table.index(_index) for _index in range(M * N)] for _table in BOOK_SYMMETRIES]
+
+def getSymmetricBitboard(bitboard, table):
+    # Move every piece of the bitboard to the cell given by the index permutation table.
+    _bitboard = 0
+    while bitboard:
+        _bit = bitboard & -bitboard
+        bitboard ^= _bit
+        _bitboard |= 1 << table[_bit.bit_length() - 1]
+    return _bitboard
+
+def getCanonicalBitboards(player, opponent):
+    # Return (player, opponent, symmetry) of the smallest of the 8 symmetric positions, so all of them share one book record.
+    _canonical = None
+    for _k, _table in enumerate(BOOK_SYMMETRIES):
+        _position = (getSymmetricBitboard(player, _table), getSymmetricBitboard(opponent, _table), _k)
+        if _canonical is None or _position[:2] < _canonical[:2]:
+            _canonical = _position
+        else:
+            pass
+    return _canonical
+
+def getBitCount(bitboard):
+    return bin(bitboard).count('1')
+
+
+class OpeningBook(object):
+    '''
+    A memory-mapped, sorted file of BOOK_RECORD = (player bitboard, opponent bitboard, move index, value) records 
+    of canonical positions, searched by binary search without loading the file.
+    The move index is i * N + j in the canonical position or -1 for pass, and the value is seen by the player to move.
+    Files are built by buildOpeningBook.
+    '''
+    def __init__(self, filename):
+        self.filename = filename
+        self.fp = open(filename, 'rb')
+        self.map = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        _magic, self.size = BOOK_HEADER.unpack_from(self.map, 0)
+        if _magic != BOOK_MAGIC:
+            self.close()
+            raise ValueError('%s is not an opening book'%(filename))
+        else:
+            pass
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, player, opponent):
+        # Return (i, j, value) of the best move of the player to move, i = j = -9 for pass, or None if the position is not in the book.
+        self.probes += 1
+        _player, _opponent, _symmetry = getCanonicalBitboards(player, opponent)
+        _low = 0
+        _high = self.size
+        while _low < _high:
+            _middle = (_low + _high) // 2
+            _record = BOOK_RECORD.unpack_from(self.map, BOOK_HEADER.size + _middle * BOOK_RECORD.size)
+            if _record[:2] < (_player, _opponent):
+                _low = _middle + 1
+            elif _record[:2] > (_player, _opponent):
+                _high = _middle
+            else:
+                self.hits += 1
+                if _record[2] < 0:
+                    return -9, -9, _record[3]
+                else:
+                    _index = BOOK_INVERSE_SYMMETRIES[_symmetry][_record[2]]
+                    return _index // N, _index % N, _record[3]
+        return None
+
+    def close(self):
+        self.map.close()
+        self.fp.close()
+
+
+class EndgameSolver(object):
+    '''
+    Exact Alpha-Beta search on bitboards to the end of the game, in negamax form.
+    The value of a finished game is the disc count of the player to move minus the disc count of the opponent.
+    '''
+    def __init__(self, sort_empties=ENDGAME_SORT_EMPTIES, config=None):
+        self.sort_empties = sort_empties
+        self.config = config if config is not None else DEFAULT_CONFIG
+        self.nodes = 0
+
+    def getBestMove(self, player, opponent):
+        # Return (exact value, move bit) for the player to move, move bit = 0 for pass.
+        self.nodes += 1
+        _moves = self.getOrderedMoves(player, opponent)
+        if not _moves:
+            return -self.getValue(opponent, player, NEGATIVE_INFINITE, POSITIVE_INFINITE, True), 0
+        else:
+            pass
+        v = NEGATIVE_INFINITE
+        _best_move = _moves[0]
+        for _move in _moves:
+            _flips = getBitboardFlips(player, opponent, _move, self.config)
+            _v = -self.getValue(opponent ^ _flips, player | _move | _flips, NEGATIVE_INFINITE, -v, False)
+            if _v > v:
+                v = _v
+                _best_move = _move
+            else:
+                pass
+        return v, _best_move
+
+    def getBestLine(self, player, opponent):
+        # Play the first best move of every position to the end of the game.
+        # Return (exact value, first move bit, final position) for the player to move, 
+        # the final position is (player bitboard, opponent bitboard) of the player to move at the root.
+        v = None
+        _first_move = 0
+        _is_root_player = True
+        while getBitboardMoves(player, opponent, self.config) or getBitboardMoves(opponent, player, self.config):
+            _value, _move = self.getBestMove(player, opponent)
+            if v is None:
+                v = _value
+                _first_move = _move
+            else:
+                pass
+            if _move:
+                _flips = getBitboardFlips(player, opponent, _move, self.config)
+                player, opponent = opponent ^ _flips, player | _move | _flips
+            else:
+                player, opponent = opponent, player
+            _is_root_player = not _is_root_player
+        if not _is_root_player:
+            player, opponent = opponent, player
+        else:
+            pass
+        if v is None: # The game is already over.
+            v = getBitCount(player) - getBitCount(opponent)
+        else:
+            pass
+        return v, _first_move, (player, opponent)
+
+    def getValue(self, player, opponent, a, b, passed):
+        # Exact value of the position for the player to move within window (a, b). passed is True after a pass of the opponent.
+        self.nodes += 1
+        _moves = self.getOrderedMoves(player, opponent)
+        if not _moves:
+            if passed: # Both players pass, the game is over.
+                return getBitCount(player) - getBitCount(opponent)
+            else:
+                return -self.getValue(opponent, player, -b, -a, True)
+        else:
+            pass
+        v = NEGATIVE_INFINITE
+        for _move in _moves:
+            _flips = getBitboardFlips(player, opponent, _move, self.config)
+            _v = -self.getValue(opponent ^ _flips, player | _move | _flips, -b, -max(a, v), False)
+            if _v > v:
+                v = _v
+                if v >= b:
+                    return v
+                else:
+                    pass
+            else:
+                pass
+        return v
+
+    def getOrderedMoves(self, player, opponent):
+        # Move bits of the player in row-major order. 
+        # With more than sort_empties empty cells, moves leaving the opponent the fewest replies are searched first.
+        _moves = []
+        _bitboard = getBitboardMoves(player, opponent, self.config)
+        while _bitboard:
+            _move = _bitboard & -_bitboard
+            _bitboard ^= _move
+            _moves.append(_move)
+        if len(_moves) > 1 and self.config.m * self.config.n - getBitCount(player | opponent) > self.sort_empties:
+            _mobility = {}
+            for _move in _moves:
+                _flips = getBitboardFlips(player, opponent, _move, self.config)
+                _mobility[_move] = getBitCount(getBitboardMoves(opponent ^ _flips, player | _move | _flips, self.config))
+            _moves.sort(key=lambda _move: _mobility[_move])
+        else:
+            pass
+        return _moves
+
+def buildOpeningBook(filename, plies=6, depth=6):
+#
+# Search every position within plies moves from the initial position at the depth, and save the best moves as an opening book.
+# Symmetric positions are searched once. Return the number of records.
+#
+    _center = M // 2 - 1
+    _black = (1 << ((_center) * N + _center + 1)) | (1 << ((_center + 1) * N + _center))
+    _white = (1 << ((_center) * N + _center)) | (1 << ((_center + 1) * N + _center + 1))
+    _template = [['*'] * N for i in range(M)]
+    _records = {}
+    _positions = [(_black, _white)] # (player to move, opponent). Black moves first.
+    for _ply in range(plies + 1):
+        _next_positions = []
+        for _player, _opponent in _positions:
+            _canonical = getCanonicalBitboards(_player, _opponent)
+            if _canonical[:2] in _records:
+                continue
+            else:
+                pass
+            _search = BitboardAlphaBetaSearch(BLACK_SYMBLE, depth, getBoardFromBitboards((_player, _opponent), _template), None, None, True, None)
+            _value, _next_state = _search.executeSearch()
+            _move = _search.best_move
+            if _move is None or _move == (-9, -9):
+                _index = -1
+            else:
+                _index = BOOK_SYMMETRIES[_canonical[2]][_move[0] * N + _move[1]]
+            _records[_canonical[:2]] = (_index, int(_value))
+            _moves = getBitboardMoves(_player, _opponent)
+            while _moves:
+                _move = _moves & -_moves
+                _moves ^= _move
+                _flips = getBitboardFlips(_player, _opponent, _move)
+                _next_positions.append((_opponent ^ _flips, _player | _move | _flips))
+        _positions = _next_positions
+        if DEBUG: print('Opening book ply %d: %d records'%(_ply, len(_records)))
+    with open(filename, 'wb') as _fp:
+        _fp.write(BOOK_HEADER.pack(BOOK_MAGIC, len(_records)))
+        for _key in sorted(_records):
+            _fp.write(BOOK_RECORD.pack(_key[0], _key[1], _records[_key][0], _records[_key][1]))
+    return len(_records)
+
+def getOpeningBook(filename=OPENING_BOOK):
+#
+# Open the opening book file once per process, or return None without a file name.
+#
+    if filename is None:
+        return None
+    elif filename not in opening_books:
+        opening_books[filename] = OpeningBook(filename)
+    else:
+        pass
+    return opening_books[filename]
+
+opening_books = {} # Opened opening books by file name.
+
+
+#
+# Vectorized evaluation: score many boards at once with NumPy.
+#    A batch of boards is an (n, M, N) int8 array with ARRAY_BLACK, ARRAY_WHITE or 0 for empty cells.
+#
+
+def getBoardArray(states, config=DEFAULT_CONFIG):
+#
+# Convert a list of list of lists boards to an (n, M, N) int8 array.
+#
+    if np is None:
+        raise ImportError('NumPy is required by getBoardArray')
+    else:
+        pass
+    _boards = np.zeros((len(states), config.m, config.n), dtype=np.int8)
+    for _k, _state in enumerate(states):
+        for i, row in enumerate(_state):
+            for j, cell in enumerate(row):
+                if cell == config.black_symbol:
+                    _boards[_k, i, j] = ARRAY_BLACK
+                elif cell == config.white_symbol:
+                    _boards[_k, i, j] = ARRAY_WHITE
+                else:
+                    pass
+    return _boards
+
+def getArrayShift(planes, direction):
+    # Move every True cell of (n, M, N) boolean planes one cell toward the direction, cells leaving the board are dropped.
+    _shifted = np.zeros_like(planes)
+    _m, _n = planes.shape[1:]
+    _increase_i, _increase_j = direction
+    _target_i = slice(max(_increase_i, 0), _m + min(_increase_i, 0))
+    _source_i = slice(max(-_increase_i, 0), _m + min(-_increase_i, 0))
+    _target_j = slice(max(_increase_j, 0), _n + min(_increase_j, 0))
+    _source_j = slice(max(-_increase_j, 0), _n + min(-_increase_j, 0))
+    _shifted[:, _target_i, _target_j] = planes[:, _source_i, _source_j]
+    return _shifted
+
+def getArrayMoves(player, opponent):
+    # Valid moves of player as (n, M, N) boolean planes, by the same spreading over continuous opponent pieces as getBitboardMoves.
+    _empty = ~(player | opponent)
+    _moves = np.zeros_like(player)
+    for _direction in DIRECTIONS:
+        _x = getArrayShift(player, _direction) & opponent
+        for _step in range(max(player.shape[1:]) - 3):
+            _x |= getArrayShift(_x, _direction) & opponent
+        _moves |= getArrayShift(_x, _direction) & _empty
+    return _moves
+
+def getBatchEvaluation(boards, max_player=BLACK_SYMBLE, config=DEFAULT_CONFIG):
+#
+# Evaluate an (n, M, N) int8 array of boards of the game configuration in one pass.
+#  Return (scores, mobility):
+#    scores[k] = getUtility of board k for max_player, the weighting matrix sum of max_player minus the sum of the opponent.
+#    mobility[k] = [number of valid moves of max_player, number of valid moves of the opponent] on board k.
+#
+    if np is None:
+        raise ImportError('NumPy is required by getBatchEvaluation')
+    else:
+        pass
+    boards = np.asarray(boards, dtype=np.int8)
+    _sign = 1 if max_player == config.black_symbol else -1
+    _scores = _sign * np.tensordot(boards.astype(np.int32), np.array(config.weight_matrix, dtype=np.int32), axes=([1, 2], [0, 1]))
+    _max_pieces = boards == _sign * ARRAY_BLACK
+    _min_pieces = boards == _sign * ARRAY_WHITE
+    _mobility = np.stack([getArrayMoves(_max_pieces, _min_pieces).sum(axis=(1, 2)), 
+                          getArrayMoves(_min_pieces, _max_pieces).sum(axis=(1, 2))], axis=1)
+    return _scores, _mobility
+
+def getSearch(player, depth, state, trace_sink=TRACE_SINK, config=None):
+#
+# Construct the Alpha-Beta search for a position with the board engine and options of the global variables,
+# and the game configuration, None for the default game.
+#
+    if TRANSPOSITION_TABLE:
+        _table = TranspositionTable(TT_MAX_ENTRIES, 0, config)
+    else:
+        _table = None
+    if MOVE_ORDERING is not None:
+        _move_ordering = MoveOrdering(MOVE_ORDERING, config)
+    else:
+        _move_ordering = None
+    if BOARD_ENGINE == 'bitboard':
+        return BitboardAlphaBetaSearch(player, depth, state, _table, _move_ordering, INCREMENTAL_EVALUATION, trace_sink, config)
+    else:
+        return AlphaBetaSearch(player, depth, state, _table, _move_ordering, INCREMENTAL_EVALUATION, trace_sink, config)
+
+
+#
+# Batch position analysis
+#    Evaluate a stream of positions on a pool of worker processes, results are streamed out in the input order.
+#    Input is either JSON lines: {"id": ..., "player": "X", "depth": 3, "board": ["********", ...], "trace": false, "time_limit": null}
+#    or a multi-board file: blocks in the format of input.txt (player line, depth line, M board lines), separated by optional blank lines.
+#
+def getBatchPositions(fp):
+    # Read positions from a file object as a generator of position dictionaries.
+    # A line which cannot be read yields {'id': ..., 'error': ...} for its position, and the reading goes on.
+    _block = []
+    _count = 0
+    for _line in fp:
+        _line = _line.rstrip('\r\n')
+        if _line.strip() == '' and _block == []:
+            continue
+        elif _line.lstrip().startswith('{'): # JSON line
+            if _block != []: # A JSON line inside a block: the block is cut short.
+                yield {'id': _count, 'error': 'board block of %d lines is cut by a JSON line, %d lines are expected'%(len(_block), M + 2)}
+                _count += 1
+                _block = []
+            else:
+                pass
+            try:
+                _position = json.loads(_line)
+                if not isinstance(_position, dict): raise ValueError('a position must be a JSON object')
+            except ValueError as _err:
+                yield {'id': _count, 'error': str(_err)}
+                _count += 1
+                continue
+            _position.setdefault('id', _count)
+            _count += 1
+            yield _position
+        else: # Multi-board block
+            _block.append(_line)
+            if len(_block) == M + 2:
+                try:
+                    _position = {'id': _count, 'player': _block[0].strip(), 'depth': int(_block[1]), 'board': [_row.rstrip() for _row in _block[2:]]}
+                except ValueError as _err:
+                    _position = {'id': _count, 'error': 'invalid depth line of a board block: %s'%(_err)}
+                yield _position
+                _count += 1
+                _block = []
+            else:
+                pass
+    if _block != []:
+        yield {'id': _count, 'error': 'board block of %d lines at the end of the input, %d lines are expected'%(len(_block), M + 2)}
+
+def getPositionState(position):
+    # Validate the player and board of a position dictionary, and return (player, list of lists board).
+    # Raise ValueError unless the player is a player symbol and the board has M rows of N cells.
+    _player = position['player']
+    _board = position['board']
+    if _player not in (BLACK_SYMBLE, WHITE_SYMBLE):
+        raise ValueError('player must be %s or %s, not %s'%(BLACK_SYMBLE, WHITE_SYMBLE, _player))
+    elif not isinstance(_board, list) or len(_board) != M or any(len(_row) != N for _row in _board):
+        raise ValueError('board must be a list of %d rows of %d cells'%(M, N))
+    else:
+        pass
+    return _player, [list(_row) for _row in _board]
+
+def getPositionAnalysis(position):
+    # Search one position and return a result dictionary which can be dumped as a JSON line.
+    #    trace: True will add the traverse log rows.
+    #    time_limit: seconds of iterative deepening instead of the fixed depth.
+    _result = {'id': position.get('id')}
+    if position.get('error') is not None: # The position could not be read.
+        _result['error'] = position['error']
+        return _result
+    else:
+        pass
+    try:
+        _player, _state = getPositionState(position)
+        _search = getSearch(_player, int(position.get('depth', 0)), _state, TRACE_SINK if position.get('trace') else None)
+        _result_value = _search.executePhaseSearch(getOpeningBook(OPENING_BOOK), ENDGAME_EMPTIES)
+        if _result_value is not None:
+            _value, _next_state = _result_value
+        elif position.get('time_limit') is not None:
+            _value, _next_state = _search.executeIterativeSearch(time_limit=float(position['time_limit']))
+        elif SEARCH_ALGORITHM == 'pvs':
+            _value, _next_state = _search.executePVSearch()
+        else:
+            _value, _next_state = _search.executeSearch()
+            if _search.best_move is not None: # executeSearch keeps the next state of the original program, not the one of the move.
+                _next_state = _search.getNextState(_search.state, _search.best_move)
+            else:
+                pass
+        if _search.best_move is not None and _next_state != _search.getNextState(_search.state, _search.best_move):
+            raise AssertionError('next state does not match the move %s'%(_search.getCoordinates(*_search.best_move)))
+        else:
+            pass
+        _result['value'] = _value
+        _result['move'] = _search.getCoordinates(*_search.best_move) if _search.best_move is not None else None
+        _result['next_state'] = [''.join(_row) for _row in _next_state]
+        _result['nodes'] = _search.nodes
+        if _search.disc_difference is not None:
+            _result['disc_difference'] = _search.disc_difference
+        else:
+            pass
+        if position.get('trace'):
+            _result['trace'] = [getActionText(_action) for _action in _search.output_actions]
+        else:
+            pass
+    except (KeyError, ValueError, IndexError, TypeError, AssertionError) as _err:
+        _result['error'] = str(_err)
+    return _result
+
+def analyzePositions(positions, workers=BATCH_WORKERS, chunksize=1):
+    # Batch API: evaluate an iterable of position dictionaries and yield the results in the input order as they finish.
+    # Startup and import costs are paid once per worker, not once per position.
+    if workers <= 1:
+        for _position in positions:
+            yield getPositionAnalysis(_position)
+    else:
+        _pool = multiprocessing.Pool(workers)
+        try:
+            for _result in _pool.imap(getPositionAnalysis, positions, chunksize):
+                yield _result
+        finally:
+            _pool.close()
+            _pool.join()
+
+def setBatchOutput(input_filename, output_filename=None, workers=BATCH_WORKERS, trace=None):
+    # Batch CLI: read positions from input file ('-' for stdin), write one JSON line per position to output file (None for stdout).
+    # trace = True / False overrides the trace option of every position.
+    _input = sys.stdin if input_filename == '-' else open(input_filename, 'r')
+    _output = sys.stdout if output_filename is None else open(output_filename, 'w')
+    try:
+        _positions = getBatchPositions(_input)
+        if trace is not None:
+            _positions = (dict(_position, trace=trace) for _position in _positions)
+        else:
+            pass
+        for _result in analyzePositions(_positions, workers):
+            _output.write(json.dumps(_result, sort_keys=True) + '\n')
+            _output.flush()
+    finally:
+        if _input is not sys.stdin: _input.close()
+        if _output is not sys.stdout: _output.close()
+
+
+#
+# Parallel search workers
+#    Every worker process builds its own search from the root state, and searches the root moves given by executeParallelSearch.
+#
+parallel_worker = None
+
+def setParallelWorker(search_class, player, depth, state, options, shared_alpha):
+    # Pool initializer: keep the search settings of the root in the worker process.
+    global parallel_worker
+    parallel_worker = (search_class, player, depth, state, options, shared_alpha)
+
+def getParallelRootValue(index):
+    # Search the index-th root move with the shared alpha bound, and publish a better alpha.
+    _search_class, _player, _depth, _state, _options, _shared_alpha = parallel_worker
+    _ordering, _table_size, _incremental_evaluation, _config = _options
+    _search = _search_class(_player, _depth, _state, 
+                            TranspositionTable(_table_size, 0, _config) if _table_size is not None else None, 
+                            MoveOrdering(_ordering, _config) if _ordering is not None else None, 
+                            _incremental_evaluation, None, _config)
+    _search.shared_alpha = _shared_alpha
+    v = _search.executeRootMove(index, _shared_alpha.value - 1)
+    with _shared_alpha.get_lock():
+        if v > _shared_alpha.value:
+            _shared_alpha.value = v
+        else:
+            pass
+    return index, v, _search.nodes
+
+def benchmarkParallelSearch(filename, depth=None, workers=[1, 2, 4, 8, 16]):
+    # Print time and speedup of executeParallelSearch against the serial search for each number of workers,
+    # and whether the value, move and next state (the board after the move) are the same as those of the serial search.
+    _player, _depth, _state = getInputData(filename)
+    if depth is not None:
+        _depth = depth
+    else:
+        pass
+    _search_class = BitboardAlphaBetaSearch if BOARD_ENGINE == 'bitboard' else AlphaBetaSearch
+    _search = _search_class(_player, _depth, _state, None, None, INCREMENTAL_EVALUATION)
+    _start = time.time()
+    _value, _next_state = _search.executeSearch()
+    _serial_time = time.time() - _start
+    _move = _search.best_move
+    _next_state = _search.getNextState(_state, _move) if _move is not None else _next_state # The board after the serial move.
+    print ('Workers,Seconds,Speedup,Value,Move,Same as serial')
+    print ('serial,%.3f,1.00,%s,%s,True'%(_serial_time, _value, _search.getCoordinates(*_move) if _move else None))
+    for _workers in workers:
+        _search = _search_class(_player, _depth, _state, None, None, INCREMENTAL_EVALUATION)
+        _start = time.time()
+        _parallel_value, _parallel_state = _search.executeParallelSearch(workers=_workers)
+        _time = time.time() - _start
+        print ('%d,%.3f,%.2f,%s,%s,%r'%(_workers, _time, _serial_time / _time, _parallel_value, 
+                                       _search.getCoordinates(*_search.best_move) if _search.best_move else None,
+                                       _parallel_value == _value and _search.best_move == _move and _parallel_state == _next_state))
+
+def verifyIncrementalUtility(games=100, seed=0):
+    # Randomized cross-check of the incremental score against getUtility.
+    # Play random games with both board engines, apply and undo random moves, and compare the score on every position.
+    # Return the number of checked positions, raise AssertionError on the first mismatch.
+    _random = random.Random(seed)
+    _checked = 0
+    _start = [['*'] * N for _i in range(M)]
+    _start[M // 2 - 1][N // 2 - 1] = WHITE_SYMBLE
+    _start[M // 2 - 1][N // 2] = BLACK_SYMBLE
+    _start[M // 2][N // 2 - 1] = BLACK_SYMBLE
+    _start[M // 2][N // 2] = WHITE_SYMBLE
+    for _game in range(games):
+        _max_player = _random.choice([BLACK_SYMBLE, WHITE_SYMBLE])
+        for _search in (AlphaBetaSearch(_max_player, 1, None, None, None, True, None), BitboardAlphaBetaSearch(_max_player, 1, None, None, None, True, None)):
+            _engine_random = random.Random(_random.random())
+            _state = [list(_row) for _row in _start]
+            if isinstance(_search, BitboardAlphaBetaSearch):
+                _state = setBitboards(_state)
+            else:
+                pass
+            _search.score = _search.getUtility(_state)
+            _player = BLACK_SYMBLE
+            _passes = 0
+            while _passes < 2:
+                _search.current_player = _player
+                _actions = _search.getActions(_state)
+                if _actions:
+                    _passes = 0
+                    # Try a move and undo it, then play another move.
+                    _score = _search.score
+                    _next_state, _undo = _search.makeMove(_state, _engine_random.choice(_actions))
+                    assert _search.score == _search.getUtility(_next_state), 'score %d != utility %d'%(_search.score, _search.getUtility(_next_state))
+                    _search.unmakeMove(_next_state, _undo) # The list board is restored in place, a bitboard state is unchanged.
+                    assert _search.score == _score == _search.getUtility(_state)
+                    _state, _undo = _search.makeMove(_state, _engine_random.choice(_actions))
+                    assert _search.score == _search.getUtility(_state), 'score %d != utility %d'%(_search.score, _search.getUtility(_state))
+                    _checked += 2
+                else:
+                    _passes += 1
+                _player = WHITE_SYMBLE if _player == BLACK_SYMBLE else BLACK_SYMBLE
+    return _checked
+
+def verifyBatchEvaluation(games=100, seed=0):
+    # Cross-check getBatchEvaluation against getUtility and getActions of both board engines, element for element,
+    # on all positions of random games for both max players.
+    # Return the number of checked positions, raise AssertionError on the first mismatch.
+    _random = random.Random(seed)
+    _start = [['*'] * N for _i in range(M)]
+    _start[M // 2 - 1][N // 2 - 1] = WHITE_SYMBLE
+    _start[M // 2 - 1][N // 2] = BLACK_SYMBLE
+    _start[M // 2][N // 2 - 1] = BLACK_SYMBLE
+    _start[M // 2][N // 2] = WHITE_SYMBLE
+    _states = []
+    _search = AlphaBetaSearch(BLACK_SYMBLE, 1, None, None, None, False, None)
+    for _game in range(games):
+        _state = [list(_row) for _row in _start]
+        _player = BLACK_SYMBLE
+        _passes = 0
+        while _passes < 2:
+            _states.append([list(_row) for _row in _state])
+            _search.current_player = _player
+            _actions = _search.getActions(_state)
+            if _actions:
+                _passes = 0
+                _state = _search.setResult(_state, _random.choice(_actions))
+            else:
+                _passes += 1
+            _player = WHITE_SYMBLE if _player == BLACK_SYMBLE else BLACK_SYMBLE
+    _boards = getBoardArray(_states)
+    for _max_player in (BLACK_SYMBLE, WHITE_SYMBLE):
+        _min_player = WHITE_SYMBLE if _max_player == BLACK_SYMBLE else BLACK_SYMBLE
+        _scores, _mobility = getBatchEvaluation(_boards, _max_player)
+        for _search in (AlphaBetaSearch(_max_player, 1, None, None, None, False, None), BitboardAlphaBetaSearch(_max_player, 1, None, None, None, False, None)):
+            for _k, _state in enumerate(_states):
+                if isinstance(_search, BitboardAlphaBetaSearch):
+                    _state = setBitboards(_state)
+                else:
+                    pass
+                _utility = _search.getUtility(_state)
+                assert _scores[_k] == _utility, 'score %d != utility %d on board %d'%(_scores[_k], _utility, _k)
+                for _index, _player in enumerate((_max_player, _min_player)):
+                    _search.current_player = _player
+                    _moves = len(_search.getActions(_state))
+                    assert _mobility[_k, _index] == _moves, 'mobility %d != %d valid moves on board %d'%(_mobility[_k, _index], _moves, _k)
+    return len(_states)
+
+def compareMoveOrdering(filenames, orderings=[None, ['weight'], ['killer', 'weight'], ['history', 'weight'], ['hash', 'killer', 'history', 'weight']], depth=None):
+    # Search each input file with each move ordering, and print visited nodes and cutoffs per depth.
+    # Orderings with 'hash' search with a transposition table filled by iterative deepening up to the depth,
+    # so their counts include the cutoffs by the table.
+    print ('File,Ordering,Value,Nodes,Cutoffs,Nodes per depth')
+    for _filename in filenames:
+        _player, _depth, _state = getInputData(_filename)
+        if depth is not None:
+            _depth = depth
+        else:
+            pass
+        for _ordering in orderings:
+            _move_ordering = MoveOrdering(_ordering) if _ordering is not None else None
+            _table = TranspositionTable() if _ordering is not None and 'hash' in _ordering else None
+            if BOARD_ENGINE == 'bitboard':
+                _search = BitboardAlphaBetaSearch(_player, _depth, _state, _table, _move_ordering, False, None)
+            else:
+                _search = AlphaBetaSearch(_player, _depth, _state, _table, _move_ordering, False, None)
+            if _table is not None:
+                _search.executeIterativeSearch(time_limit=None, max_depth=_depth - 1)
+                _search.resetSearch(_depth)
+            else:
+                pass
+            _value, _next_state = _search.executeSearch()
+            print ('%s,%s,%s,%d,%d,%s'%(_filename, '+'.join(_ordering) if _ordering is not None else 'row-major', _value, 
+                                       sum(_search.nodes_per_depth), sum(_search.cutoffs_per_depth), 
+                                       ' '.join(str(_n) for _n in _search.nodes_per_depth)))
+
+def comparePVSearch(filenames, orderings=[None, ['killer', 'history', 'weight']], depth=None):
+    # Search each input file with each move ordering by Alpha-Beta and PVS at the depth, 
+    # and by iterative deepening up to the depth with Alpha-Beta and with PVS and aspiration windows.
+    # Print the values, visited nodes of all iterations, searches repeated by PVS,
+    # and whether the value and the board after the best move are the same as those of Alpha-Beta with the same ordering.
+    print ('File,Algorithm,Ordering,Value,Nodes,Researches,Same as alphabeta')
+    for _filename in filenames:
+        _player, _depth, _state = getInputData(_filename)
+        if depth is not None:
+            _depth = depth
+        else:
+            pass
+        for _ordering in orderings:
+            for _algorithm in ['alphabeta', 'pvs', 'iterative alphabeta', 'iterative pvs']:
+                _move_ordering = MoveOrdering(_ordering) if _ordering is not None else None
+                if BOARD_ENGINE == 'bitboard':
+                    _search = BitboardAlphaBetaSearch(_player, _depth, _state, None, _move_ordering, True, None)
+                else:
+                    _search = AlphaBetaSearch(_player, _depth, _state, None, _move_ordering, True, None)
+                if _algorithm == 'pvs':
+                    _value, _next_state = _search.executePVSearch()
+                elif _algorithm.startswith('iterative'):
+                    _value, _next_state = _search.executeIterativeSearch(time_limit=None, max_depth=_depth, algorithm=_algorithm.split()[1])
+                else:
+                    _value, _next_state = _search.executeSearch()
+                    _next_state = _search.getNextState(_state, _search.best_move) # executeSearch keeps the next state of the original program.
+                    _alphabeta = (_value, _next_state)
+                print ('%s,%s,%s,%s,%d,%d,%r'%(_filename, _algorithm, '+'.join(_ordering) if _ordering is not None else 'row-major', _value, 
+                                             _search.nodes, _search.researches, (_value, _next_state) == _alphabeta))
+
 if __name__ == "__main__":
 
     '''
@@ -582,14 +2611,76 @@ if __name__ == "__main__":
     '''
     #program_name = sys.argv[0]
     #input_file = sys.argv[1]
+    parser = argparse.ArgumentParser(description='Alpha-Beta search of a Reversi position in %s.'%(INPUT_FILE))
+    parser.add_argument('--compare-ordering', nargs='+', metavar='INPUT', help='print nodes and cutoffs of each move ordering on the input files')
+    parser.add_argument('--compare-pvs', nargs='+', metavar='INPUT', help='print nodes of Alpha-Beta and PVS with aspiration windows on the input files')
+    parser.add_argument('--depth', type=int, default=None, help='search depth instead of the depth in the input files')
+    parser.add_argument('--benchmark-parallel', metavar='INPUT', help='print speedup of the parallel search on the input file at 1, 2, 4, 8 and 16 workers')
+    parser.add_argument('--batch', metavar='INPUT', help="analyze a JSON lines or multi-board file ('-' for stdin) and stream JSON lines results")
+    parser.add_argument('--output', metavar='OUTPUT', default=None, help='output file of the batch analysis, default is stdout')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS, help='worker processes of the batch analysis')
+    parser.add_argument('--trace', dest='trace', action='store_true', default=None, help='add the traverse log of every position to the batch results')
+    parser.add_argument('--no-trace', dest='trace', action='store_false', help='remove the traverse log from every batch result')
+    parser.add_argument('--verify-incremental', type=int, nargs='?', const=100, metavar='GAMES', help='cross-check incremental evaluation against getUtility on random games')
+    parser.add_argument('--build-book', metavar='BOOK', help='search all positions within --plies moves of the initial position at --depth (default 6) and save them as an opening book')
+    parser.add_argument('--plies', type=int, default=6, help='number of opening moves covered by --build-book')
+    parser.add_argument('--stats', metavar='STATS', default=STATS_FILE, help='save the search statistics of %s as JSON to the file'%(INPUT_FILE))
+    parser.add_argument('--verify-batch-evaluation', type=int, nargs='?', const=100, metavar='GAMES', help='cross-check NumPy batch evaluation against getUtility and getActions on random games')
+    args = parser.parse_args()
+    if args.compare_pvs:
+        comparePVSearch(args.compare_pvs, depth=args.depth)
+        exit()
+    elif args.build_book:
+        print ('%d positions saved to %s'%(buildOpeningBook(args.build_book, args.plies, args.depth if args.depth is not None else 6), args.build_book))
+        exit()
+    elif args.compare_ordering:
+        compareMoveOrdering(args.compare_ordering, depth=args.depth)
+        exit()
+    elif args.batch:
+        setBatchOutput(args.batch, args.output, args.workers, args.trace)
+        exit()
+    elif args.benchmark_parallel:
+        benchmarkParallelSearch(args.benchmark_parallel, depth=args.depth)
+        exit()
+    elif args.verify_batch_evaluation:
+        print ('Batch evaluation matches getUtility and getActions on %d positions.'%(verifyBatchEvaluation(args.verify_batch_evaluation)))
+        exit()
+    elif args.verify_incremental:
+        print ('Incremental evaluation matches getUtility on %d positions.'%(verifyIncrementalUtility(args.verify_incremental)))
+        exit()
+    else:
+        pass
     input_file = INPUT_FILE
     actions = []
     value = 0
     
     player, depth, initial_state = getInputData(input_file)
-    abs = AlphaBetaSearch(player, depth, initial_state)
-    value, next_state = abs.executeSearch()
+    abs = getSearch(player, depth, initial_state)
+    table = abs.transposition_table
+    stats = None
+    if args.stats:
+        stats = SearchStats()
+        stats.attach(abs, 'iterative ' + SEARCH_ALGORITHM if ITERATIVE_DEEPENING else SEARCH_ALGORITHM)
+    else:
+        pass
+    result = abs.executePhaseSearch(getOpeningBook(OPENING_BOOK), ENDGAME_EMPTIES)
+    if result is not None:
+        value, next_state = result
+    elif ITERATIVE_DEEPENING:
+        value, next_state = abs.executeIterativeSearch(time_limit=SEARCH_TIME_LIMIT, node_limit=SEARCH_NODE_LIMIT)
+    elif PARALLEL_WORKERS > 1:
+        value, next_state = abs.executeParallelSearch(workers=PARALLEL_WORKERS)
+    elif SEARCH_ALGORITHM == 'pvs':
+        value, next_state = abs.executePVSearch()
+    else:
+        value, next_state = abs.executeSearch()
     action_steps = abs.output_actions
+    if DEBUG and table is not None: print ('Transposition table = %s'%(table.getStatistics()))
+    if stats is not None:
+        with open(args.stats, 'w') as _fp:
+            stats.detach().writeJSON(_fp)
+    else:
+        pass
         
     setOutputData(OUTPUT_FILE, action_steps, next_state)
                      
@@ -0,0 +1,639 @@
+#!/usr/bin/env python
+# encoding: utf-8
+'''
+Benchmark: Run the solvers of this repository on the bundled and generated workloads and track their speed.
+
+Solvers:
+    reversi: Alpha-Beta search of Alpha-Beta_Pruning/Alpha-Beta_Pruning.py by getSearch / executeSearch.
+    wedding: Wedding arrangement of Propositional_Logic/PL_Resolution_WalkSAT.py by Wedding.execution.
+    bayes: Bayesian network queries of DecisionNetwork/DecisionNetwork.py by ask.
+
+Every case runs in its own process with a time limit. It records:
+    1. Wall time (best of the repeated runs) and peak memory.
+    2. Counters of the solver, e.g. visited nodes, number of clauses or variables.
+    3. Correctness against the expected output of a bundled case, the planted answer of a generated wedding,
+       or the result saved in the baseline file for the other generated cases.
+    4. Time and memory compared with the baseline file.
+Check cases run the randomized self checks of a solver, e.g. verifyIncrementalUtility, and fail on the first mismatch.
+
+@author: Cheng-Lin Li a.k.a. Clark Li
+
+@copyright:    2017 Cheng-Lin Li@University of Southern California. All rights reserved.
+
+@license:    Licensed under the GNU v3.0. https://www.gnu.org/licenses/gpl.html
+
+@contact:    chenglil@usc.edu
+@version:    1.0
+'''
+from __future__ import print_function
+import sys
+import os
+import glob
+import time
+import json
+import random
+import hashlib
+import argparse
+import tempfile
+import shutil
+import multiprocessing
+import platform
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+try:
+    import tracemalloc
+except ImportError: # Python 2.7 measures the peak resident set size of the case process instead.
+    tracemalloc = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+__all__ = []
+__version__ = 1.0
+
+DEBUG = False
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Root folder of the repository.
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SOLVERS = ['reversi', 'wedding', 'bayes']
+SOLVER_FILES = {'reversi': os.path.join('Alpha-Beta_Pruning', 'Alpha-Beta_Pruning.py'),
+                'wedding': os.path.join('Propositional_Logic', 'PL_Resolution_WalkSAT.py'),
+                'bayes': os.path.join('DecisionNetwork', 'DecisionNetwork.py')}
+REPEAT = 3 # Runs of each case, the best wall time is reported.
+TIMEOUT = 300 # Seconds of a case before it is stopped.
+SCALE = 1 # Size factor of the generated workloads.
+SEED = 0 # Random seed of the generated workloads and of the solvers.
+TOLERANCE = 0.25 # A case regresses when its time or memory exceeds the baseline by this fraction,
+MIN_TIME_DELTA = 0.05 #    and by at least this many seconds
+MIN_MEMORY_DELTA = 1024 #    or kilobytes.
+STATUS_OK = 'ok'
+STATUS_SKIPPED = 'skipped' # Not run: a check case whose optional dependency is not installed, or a solver which does not load,
+                           #    with the same error text as in the baseline. It neither passes nor fails the run.
+CHECKS = {'reversi': [('incremental_evaluation', 'verifyIncrementalUtility', None), # (case name, self check function of the module,
+                      ('batch_evaluation', 'verifyBatchEvaluation', 'numpy')]}        #  optional module it needs) of each solver.
+CHECK_GAMES = 100 # Random games played by each self check.
+ENCODINGS = ['pairwise', 'sequential', 'commander', 'product'] # At-most-one encodings of the wedding rules in the encoding report,
+ENCODING_WEDDINGS = [(100, 10), (200, 20), (300, 40)] #    on weddings of (guests times scale, tables),
+ENCODING_ALGORITHMS = ['DPLL', 'CDCL'] #    solved by these algorithms.
+MEMORY_METHOD = 'tracemalloc peak' if tracemalloc is not None else 'resident set size increase' # Peak memory is only compared with a baseline of the same method and Python version.
+
+
+def getModule(solver):
+#
+# Load the module of a solver from its file. The file names are not valid module names, e.g. Alpha-Beta_Pruning.py.
+#
+    _filename = os.path.join(ROOT, SOLVER_FILES[solver])
+    _name = 'benchmark_' + solver
+    if _name in sys.modules:
+        return sys.modules[_name]
+    else:
+        pass
+    try:
+        import importlib.util
+        _spec = importlib.util.spec_from_file_location(_name, _filename)
+        _module = importlib.util.module_from_spec(_spec)
+        sys.modules[_name] = _module
+        try:
+            _spec.loader.exec_module(_module)
+        except BaseException:
+            del sys.modules[_name]
+            raise
+    except ImportError: # Python 2.7
+        import imp
+        _module = imp.load_source(_name, _filename)
+    _module.DEBUG = 0
+    return _module
+
+def getOutputText(function, *args):
+#
+# Call the setOutputData function of a solver and return what it prints.
+#
+    _stdout = sys.stdout
+    sys.stdout = StringIO()
+    try:
+        function(*args)
+        return sys.stdout.getvalue()
+    finally:
+        sys.stdout = _stdout
+
+def getTextLines(text):
+    return [_line.strip() for _line in text.strip().splitlines()]
+
+
+#
+# Solver runners
+#    runX(module, input_file) solves the input file by the entry point of the solver,
+#    and returns the output text in the format of the output files and a dictionary of counters.
+#
+def runReversi(module, input_file):
+    _player, _depth, _state = module.getInputData(input_file)
+    _search = module.getSearch(_player, _depth, _state)
+    _value, _next_state = _search.executeSearch()
+    _text = getOutputText(module.setOutputData, None, _search.output_actions, _next_state)
+    return _text, {'depth': _depth, 'value': _value, 'nodes': _search.nodes,
+                   'cutoffs': sum(_search.cutoffs_per_depth), 'trace_rows': len(_search.output_actions)}
+
+def runWedding(module, input_file):
+    _guests, _tables, _restrictions = module.getInputData(input_file)
+    _wedding = module.Wedding(_guests, _tables, _restrictions)
+    _is_satisfiable, _arrangement = _wedding.execution()
+    _text = getOutputText(module.setOutputData, None, _is_satisfiable, _arrangement)
+    _symbols = set()
+    for _clause in _wedding.CNFSentance:
+        for _literal in _clause:
+            _symbols.add(_literal.lstrip(module.NOT))
+    return _text, {'guests': _guests, 'tables': _tables, 'restrictions': len(_restrictions),
+                   'clauses': len(_wedding.CNFSentance), 'symbols': len(_symbols)}
+
+def runBayes(module, input_file):
+    _queries, _network = module.getInputData(input_file)
+    _results = [module.ask(_query, _network) for _query in _queries]
+    _text = getOutputText(module.setOutputData, None, _results)
+    return _text, {'queries': len(_queries), 'variables': len(_network.variables),
+                   'parents': sum(len(_variable.parents) for _variable in _network.variables)}
+
+RUNNERS = {'reversi': runReversi, 'wedding': runWedding, 'bayes': runBayes}
+
+def runCheck(module, check):
+    # Run the self check function of a solver, which raises AssertionError on the first mismatch.
+    _checked = getattr(module, check)(CHECK_GAMES, SEED)
+    return '', {'positions': _checked}
+
+
+#
+# Correctness checks
+#    checkX(case, text) returns True when the output text is correct, or None when the case has no expected output.
+#
+def checkOutput(case, text):
+    if case['expected'] is None:
+        return None
+    else:
+        return getTextLines(text) == getTextLines(case['expected'])
+
+def checkWedding(case, text):
+    # WalkSAT may find any of the arrangements, so the arrangement is checked against the rules instead of the expected output.
+    _lines = getTextLines(text)
+    if case['expected'] is None:
+        return None
+    elif not _lines or _lines[0] != getTextLines(case['expected'])[0]:
+        return False
+    elif _lines[0] == 'no':
+        return len(_lines) == 1
+    else:
+        pass
+    _guests, _tables, _restrictions = getWeddingInput(case['input'])
+    _arrangement = {}
+    for _line in _lines[1:]:
+        _guest, _table = _line.split()
+        _arrangement[int(_guest)] = int(_table)
+    if sorted(_arrangement) != list(range(1, _guests + 1)) or not all(1 <= _t <= _tables for _t in _arrangement.values()):
+        return False
+    else:
+        pass
+    for _a, _b, _relation in _restrictions:
+        if _relation == 'F' and _arrangement[_a] != _arrangement[_b]:
+            return False
+        elif _relation == 'E' and _arrangement[_a] == _arrangement[_b]:
+            return False
+        else:
+            pass
+    return True
+
+def getWeddingInput(filename):
+    # Read a wedding input file without the solver: guests, tables and [(guest a, guest b, 'F' or 'E')].
+    with open(filename, 'r') as _fp:
+        _rows = [_line.split() for _line in _fp if _line.strip()]
+    return int(_rows[0][0]), int(_rows[0][1]), [(int(_row[0]), int(_row[1]), _row[2]) for _row in _rows[1:]]
+
+CHECKERS = {'reversi': checkOutput, 'wedding': checkWedding, 'bayes': checkOutput}
+
+
+#
+# Workloads
+#    A case is a dictionary of solver, name, input file and expected output text (None if unknown).
+#    Generated inputs are written in the input format of the solver, so they run through the same entry point.
+#
+def getBundledCases(solver):
+    _cases = []
+    _folder = os.path.dirname(os.path.join(ROOT, SOLVER_FILES[solver]))
+    for _input in sorted(glob.glob(os.path.join(_folder, 'input*.txt'))):
+        _output = os.path.join(_folder, os.path.basename(_input).replace('input', 'output', 1))
+        if os.path.exists(_output):
+            with open(_output, 'r') as _fp:
+                _cases.append({'solver': solver, 'name': os.path.basename(_input), 'input': _input, 'expected': _fp.read()})
+        else:
+            pass
+    return _cases
+
+def getRandomIndex(rnd, n):
+    # Random index below n. Unlike choice, randint and sample, it is the same on Python 2 and 3 for the same seed.
+    return int(rnd.random() * n)
+
+def getRandomSample(rnd, population, k):
+    _population = list(population)
+    for _i in range(k):
+        _j = _i + getRandomIndex(rnd, len(_population) - _i)
+        _population[_i], _population[_j] = _population[_j], _population[_i]
+    return _population[:k]
+
+def getReversiPositions(module, plies, rnd):
+    # Play random moves from the initial position, return the player to move and the board.
+    _black, _white = module.BLACK_SYMBLE, module.WHITE_SYMBLE
+    _state = [['*'] * module.N for _i in range(module.M)]
+    _state[module.M // 2 - 1][module.N // 2 - 1] = _state[module.M // 2][module.N // 2] = _white
+    _state[module.M // 2 - 1][module.N // 2] = _state[module.M // 2][module.N // 2 - 1] = _black
+    _search = module.AlphaBetaSearch(_black, 1, None)
+    _player = _black
+    for _ply in range(plies):
+        _search.current_player = _player
+        _actions = _search.getActions(_state)
+        if _actions:
+            _state = _search.setResult(_state, _actions[getRandomIndex(rnd, len(_actions))])
+        else:
+            pass
+        _player = _white if _player == _black else _black
+    return _player, _state
+
+def getReversiCases(folder, scale, rnd):
+    # Deeper searches of midgame positions: depth 4 to 5 + scale.
+    _module = getModule('reversi')
+    _cases = []
+    for _index, _plies in enumerate([12, 24]):
+        _player, _state = getReversiPositions(_module, _plies, rnd)
+        for _depth in range(4, 6 + scale):
+            _name = 'midgame%d_depth%d.txt'%(_index + 1, _depth)
+            _filename = os.path.join(folder, 'reversi_' + _name)
+            with open(_filename, 'w') as _fp:
+                _fp.write('%s\n%d\n%s\n'%(_player, _depth, '\n'.join(''.join(_row) for _row in _state)))
+            _cases.append({'solver': 'reversi', 'name': _name, 'input': _filename, 'expected': None})
+    return _cases
+
+def getWeddingCases(folder, scale, rnd):
+    #
+    # Larger weddings with a planted arrangement: friends sit at the same planted table, enemies at different ones.
+    # A friend chain between two enemies of the same table makes an unsatisfiable variant, which the merge of the friend groups
+    # already settles. The hostile variant plants the guests at one table more than there are, with one guest of each planted table
+    # the enemy of the others: the friend groups do not conflict, so the solver has to prove that the groups do not fit the tables.
+    #
+    _cases = []
+    _weddings = [(6 + 4 * scale, 2), (8 + 4 * scale, 3), (10 + 4 * scale, 4)]
+    for _guests, _tables in _weddings:
+        _planted = dict((_guest, 1 + getRandomIndex(rnd, _tables)) for _guest in range(1, _guests + 1))
+        _restrictions = getPlantedRules(_guests, _planted, rnd)
+        for _satisfiable in [True, False]:
+            _rules = list(_restrictions)
+            if not _satisfiable:
+                _rules.append((1, 2, 'F'))
+                _rules.append((2, 3, 'F'))
+                _rules.append((1, 3, 'E'))
+            else:
+                pass
+            _cases.append(setWeddingCase(folder, 'guests%d_tables%d_%s.txt'%(_guests, _tables, 'yes' if _satisfiable else 'no'),
+                                         _guests, _tables, _rules, 'yes' if _satisfiable else 'no'))
+    for _guests, _tables in _weddings: # After the other weddings, so their random draws do not change.
+        _planted = dict((_guest, 1 + (_guest - 1) % (_tables + 1)) for _guest in range(1, _guests + 1))
+        _rules = getPlantedRules(_guests, _planted, rnd)
+        _rules.extend((_a, _b, 'E') for _a in range(1, _tables + 2) for _b in range(_a + 1, _tables + 2) if (_a, _b, 'E') not in _rules)
+        _cases.append(setWeddingCase(folder, 'guests%d_tables%d_hostile.txt'%(_guests, _tables), _guests, _tables, _rules, 'no'))
+    return _cases
+
+def getPlantedRules(guests, planted, rnd):
+    # 2 * guests random restrictions which hold in the planted arrangement {guest: table}.
+    _pairs = [(_a, _b) for _a in range(1, guests + 1) for _b in range(_a + 1, guests + 1) if _b > 3]
+    return [(_a, _b, 'F' if planted[_a] == planted[_b] else 'E') for _a, _b in getRandomSample(rnd, _pairs, min(len(_pairs), 2 * guests))]
+
+def setWeddingCase(folder, name, guests, tables, rules, expected):
+    # Write the wedding input file and return its case.
+    _filename = os.path.join(folder, 'wedding_' + name)
+    with open(_filename, 'w') as _fp:
+        _fp.write('%d %d\n'%(guests, tables))
+        _fp.write('\n'.join('%d %d %s'%_rule for _rule in rules))
+    return {'solver': 'wedding', 'name': name, 'input': _filename, 'expected': expected}
+
+def getBayesCases(folder, scale, rnd):
+    # Wider Bayesian networks: 3 layers of width nodes, each node has up to 2 parents in the layer above.
+    _cases = []
+    for _width in [4 * scale, 8 * scale, 12 * scale]:
+        _layers = [['N%d_%d'%(_layer, _k) for _k in range(_width)] for _layer in range(3)]
+        _blocks = []
+        for _layer, _names in enumerate(_layers):
+            for _name in _names:
+                _parents = getRandomSample(rnd, _layers[_layer - 1], min(2, _width)) if _layer > 0 else []
+                _lines = [_name + (' | ' + ' '.join(_parents) if _parents else '')]
+                for _k in range(2 ** len(_parents)):
+                    _values = ['+' if (_k >> _bit) & 1 == 0 else '-' for _bit in range(len(_parents) - 1, -1, -1)]
+                    _lines.append(' '.join(['%.2f'%(rnd.uniform(0.05, 0.95))] + _values))
+                _blocks.append('\n'.join(_lines))
+        _top, _bottom = _layers[0], _layers[-1]
+        _queries = ['P(%s = +)'%(_bottom[0]),
+                    'P(%s = + | %s = -)'%(_bottom[-1], _top[0]),
+                    'P(%s = +, %s = - | %s = +)'%(_bottom[0], _bottom[-1], _top[-1])]
+        _name = 'layers3_width%d.txt'%(_width)
+        _filename = os.path.join(folder, 'bayes_' + _name)
+        with open(_filename, 'w') as _fp:
+            _fp.write('\n'.join(_queries) + '\n******\n' + '\n***\n'.join(_blocks))
+        _cases.append({'solver': 'bayes', 'name': _name, 'input': _filename, 'expected': None})
+    return _cases
+
+GENERATORS = {'reversi': getReversiCases, 'wedding': getWeddingCases, 'bayes': getBayesCases}
+
+def getCheckCases(solver):
+    # The input of a check case is the name of its self check function. 
+    # A check is skipped when the optional module it needs is not installed.
+    _cases = []
+    for _name, _check, _requirement in CHECKS.get(solver, []):
+        _case = {'solver': solver, 'name': _name, 'input': _check, 'expected': None}
+        if _requirement is not None:
+            try:
+                __import__(_requirement)
+            except ImportError:
+                _case['skipped'] = '%s is not installed'%(_requirement)
+        else:
+            pass
+        _cases.append(_case)
+    return _cases
+
+def getCases(solvers, folder, scale=SCALE, seed=SEED, generated=True):
+    _cases = []
+    for _solver in solvers:
+        for _case in getBundledCases(_solver):
+            _case['kind'] = 'bundled'
+            _cases.append(_case)
+        if generated:
+            try:
+                for _case in GENERATORS[_solver](folder, scale, random.Random(seed)):
+                    _case['kind'] = 'generated'
+                    _cases.append(_case)
+            except Exception as _err: # e.g. the solver module cannot be loaded to play the random moves.
+                _cases.append({'solver': _solver, 'name': 'generated', 'kind': 'generated', 'input': None, 'expected': None,
+                               'error': '%s: %s'%(type(_err).__name__, _err)})
+        else:
+            pass
+        for _case in getCheckCases(_solver):
+            _case['kind'] = 'check'
+            _cases.append(_case)
+    return _cases
+
+
+#
+# Case execution
+#
+def getResidentKB():
+    # Resident set size of this process in kilobytes, 0 if unknown.
+    try:
+        with open('/proc/self/statm', 'r') as _fp:
+            return int(_fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (IOError, OSError, ValueError):
+        return 0
+
+def getErrorText(error):
+    # 'Type: first line of the message' of an exception.
+    return '%s: %s'%(type(error).__name__, str(error).splitlines()[0] if str(error) else '')
+
+def executeCase(case, repeat, seed, queue):
+    # Run a case in the current process and put the result dictionary to the queue.
+    _result = {'time': None, 'peak_memory_kb': None, 'counters': {}, 'digest': None, 'correct': None, 'error': None}
+    try:
+        _module = getModule(case['solver'])
+        _runner = runCheck if case['kind'] == 'check' else RUNNERS[case['solver']]
+        _times = []
+        _start_kb = getResidentKB()
+        for _run in range(repeat):
+            random.seed(seed)
+            _start = time.time()
+            _text, _counters = _runner(_module, case['input'])
+            _times.append(time.time() - _start)
+        if tracemalloc is not None:
+            random.seed(seed)
+            tracemalloc.start()
+            _runner(_module, case['input'])
+            _result['peak_memory_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+        elif resource is not None:
+            _result['peak_memory_kb'] = max([0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - _start_kb])
+        else:
+            pass
+        _result['time'] = min(_times)
+        _result['counters'] = _counters
+        _result['digest'] = hashlib.md5(_text.encode('utf-8')).hexdigest()
+        _result['correct'] = True if case['kind'] == 'check' else CHECKERS[case['solver']](case, _text)
+    except BaseException as _err:
+        _result['error'] = getErrorText(_err)
+    queue.put(_result)
+
+def runCase(case, repeat=REPEAT, timeout=TIMEOUT, seed=SEED):
+    # Run a case in a new process, so every case starts from the same memory and module state and can be stopped.
+    if case.get('skipped'): # The error of a solver which does not load is kept, so a saved baseline still records it.
+        return {'time': None, 'peak_memory_kb': None, 'counters': {}, 'digest': None, 'correct': None, 'error': case.get('error'), 'skipped': case['skipped']}
+    elif case.get('error'):
+        return {'time': None, 'peak_memory_kb': None, 'counters': {}, 'digest': None, 'correct': None, 'error': case['error']}
+    else:
+        pass
+    _queue = multiprocessing.Queue()
+    _process = multiprocessing.Process(target=executeCase, args=(case, repeat, seed, _queue))
+    _process.start()
+    try:
+        _result = _queue.get(timeout=timeout)
+    except Exception: # Queue.Empty
+        _result = {'time': None, 'peak_memory_kb': None, 'counters': {}, 'digest': None, 'correct': None,
+                   'error': 'Timeout: more than %s seconds'%(timeout)}
+    _process.join(1)
+    if _process.is_alive():
+        _process.terminate()
+        _process.join()
+    else:
+        pass
+    return _result
+
+
+#
+# Baseline comparison
+#
+def getCaseKey(case):
+    return '%s/%s/%s'%(case['solver'], case['kind'], case['name'])
+
+def getBaseline(filename):
+    if filename and os.path.exists(filename):
+        with open(filename, 'r') as _fp:
+            return json.load(_fp)
+    else:
+        return {'cases': {}}
+
+def setBaseline(filename, results, scale, repeat):
+    _baseline = {'python': platform.python_version(), 'scale': scale, 'repeat': repeat,
+                 'memory': MEMORY_METHOD,
+                 'cases': dict((_key, _result) for _key, _result in results)}
+    with open(filename, 'w') as _fp:
+        json.dump(_baseline, _fp, indent=1, sort_keys=True, separators=(',', ': '))
+        _fp.write('\n')
+
+def getBaselineDifferences(baseline):
+    # Reasons not to compare the time and the memory with a baseline measured by another Python version or memory method.
+    _differences = {}
+    if baseline.get('python') and baseline['python'].split('.')[:2] != list(platform.python_version_tuple()[:2]):
+        _differences['time'] = 'baseline on Python %s'%(baseline['python'])
+    else:
+        pass
+    if baseline.get('memory') and baseline['memory'] != MEMORY_METHOD:
+        _differences['memory'] = 'baseline memory by %s'%(baseline['memory'])
+    elif 'time' in _differences:
+        _differences['memory'] = _differences['time']
+    else:
+        pass
+    return _differences
+
+def getStatus(result, base, tolerance=TOLERANCE, differences={}):
+    #
+    # Status of a case: ok, skipped, error, wrong output, changed output against the baseline, slower, or more memory,
+    # and a note of the measures not compared because the baseline ran in another environment, see getBaselineDifferences.
+    #
+    if result.get('skipped'):
+        return STATUS_SKIPPED, None
+    elif result['error']:
+        return 'error', None
+    elif result['correct'] is False:
+        return 'wrong', None
+    elif base is None:
+        return STATUS_OK, None
+    elif result['correct'] is None and base.get('digest') is not None and result['digest'] != base['digest']:
+        return 'changed', None
+    _note = '; '.join('%s not compared: %s'%(_measure, differences[_measure]) for _measure in ('time', 'memory') if _measure in differences) or None
+    if ('time' not in differences and base.get('time') is not None and 
+        result['time'] > base['time'] * (1 + tolerance) and result['time'] - base['time'] > MIN_TIME_DELTA):
+        return 'slower', _note
+    elif ('memory' not in differences and base.get('peak_memory_kb') is not None and result['peak_memory_kb'] is not None and
+          result['peak_memory_kb'] > base['peak_memory_kb'] * (1 + tolerance) and result['peak_memory_kb'] - base['peak_memory_kb'] > MIN_MEMORY_DELTA):
+        return 'more memory', _note
+    else:
+        return STATUS_OK, _note
+
+def executeBenchmark(solvers=SOLVERS, scale=SCALE, repeat=REPEAT, timeout=TIMEOUT, baseline_file=BASELINE_FILE,
+                     save_baseline=False, generated=True, tolerance=TOLERANCE, seed=SEED):
+#
+# Run all cases, print one CSV line per case and return the list of (case key, result) and the number of failed cases.
+# The cases of a solver which does not load are skipped when the baseline records the same error text for them, 
+# otherwise they run and fail with the error.
+#
+    _folder = tempfile.mkdtemp(prefix='benchmark_')
+    _baseline = getBaseline(baseline_file) if not save_baseline else {'cases': {}}
+    _differences = getBaselineDifferences(_baseline)
+    _results = []
+    _failures = 0
+    _load_errors = {}
+    for _solver in solvers:
+        # Load the modules before the case processes start, so the loading is not counted as the memory of a case.
+        try:
+            getModule(_solver)
+        except BaseException as _err:
+            _load_errors[_solver] = getErrorText(_err)
+    try:
+        _cases = getCases(solvers, _folder, scale, seed, generated)
+        print ('Solver,Kind,Case,Status,Time,Peak memory (KB),Baseline time,Ratio,Counters')
+        for _case in _cases:
+            _key = getCaseKey(_case)
+            _base = _baseline['cases'].get(_key)
+            if _case['solver'] in _load_errors and _base is not None and _base.get('error') == _load_errors[_case['solver']]:
+                _case['error'] = _load_errors[_case['solver']]
+                _case['skipped'] = 'the solver does not load, as in the baseline: %s'%(_case['error'])
+            else:
+                pass
+            _result = runCase(_case, repeat, timeout, seed)
+            _result['status'], _note = getStatus(_result, _base, tolerance, _differences)
+            if _result['status'] not in (STATUS_OK, STATUS_SKIPPED): _failures += 1
+            _base_time = _base.get('time') if _base is not None else None
+            print ('%s,%s,%s,%s,%s,%s,%s,%s,%s'%(_case['solver'], _case['kind'], _case['name'],
+                   _result['status'] + (' (%s)'%(_result.get('skipped') or _result['error'] or _note) if _result.get('skipped') or _result['error'] or _note else ''),
+                   '%.4f'%(_result['time']) if _result['time'] is not None else '',
+                   _result['peak_memory_kb'] if _result['peak_memory_kb'] is not None else '',
+                   '%.4f'%(_base_time) if _base_time is not None else '',
+                   '%.2f'%(_result['time'] / _base_time) if _base_time and _result['time'] is not None else '',
+                   ' '.join('%s=%s'%(_name, _result['counters'][_name]) for _name in sorted(_result['counters']))))
+            sys.stdout.flush()
+            _results.append((_key, _result))
+    finally:
+        shutil.rmtree(_folder, ignore_errors=True)
+    if save_baseline:
+        setBaseline(baseline_file, _results, scale, repeat)
+    else:
+        pass
+    return _results, _failures
+
+
+#
+# At-most-one encoding report
+#
+def getPlantedRestrictions(guests, tables, rnd):
+    # 2 * guests random pairs of a planted arrangement in the format of getInputData: friends at the same table, enemies at different ones.
+    _planted = dict((_guest, 1 + getRandomIndex(rnd, tables)) for _guest in range(1, guests + 1))
+    _pairs = [(_a, _b) for _a in range(1, guests + 1) for _b in range(_a + 1, guests + 1)]
+    return [[str(_a), str(_b), 'F' if _planted[_a] == _planted[_b] else 'E'] for _a, _b in getRandomSample(rnd, _pairs, min(len(_pairs), 2 * guests))]
+
+def executeEncodingReport(scale=SCALE, seed=SEED):
+#
+# Print one CSV line per wedding and at-most-one encoding: clauses, symbols, time of getWeddingRules
+# and time of each complete algorithm (compiling the clauses included).
+#
+    _module = getModule('wedding')
+    _encoding = _module.AT_MOST_ONE
+    _rnd = random.Random(seed)
+    print ('Guests,Tables,Encoding,Clauses,Symbols,Generation time,%s,Satisfiable'%(','.join('%s time'%(_algorithm) for _algorithm in ENCODING_ALGORITHMS)))
+    try:
+        for _guests, _tables in ENCODING_WEDDINGS:
+            _guests *= scale
+            _restrictions = getPlantedRestrictions(_guests, _tables, _rnd)
+            for _module.AT_MOST_ONE in ENCODINGS:
+                _wedding = _module.Wedding(_guests, _tables, _restrictions)
+                _start = time.time()
+                _clauses = _wedding.getWeddingRules()
+                _generation_time = time.time() - _start
+                _times = []
+                for _algorithm in ENCODING_ALGORITHMS:
+                    random.seed(seed)
+                    _start = time.time()
+                    _kb = _module.Prop_KB(_clauses)
+                    _is_satisfiable = _module.Propositional_Logic().is_satisfiable(_kb, _algorithm)
+                    _times.append(time.time() - _start)
+                print ('%d,%d,%s,%d,%d,%.4f,%s,%s'%(_guests, _tables, _module.AT_MOST_ONE, len(_clauses), _kb.get_CNF().get_variable_count(),
+                       _generation_time, ','.join('%.4f'%(_time) for _time in _times), _is_satisfiable))
+                sys.stdout.flush()
+    finally:
+        _module.AT_MOST_ONE = _encoding
+
+
+if __name__ == "__main__":
+
+    '''
+        Main program.
+            Run the benchmark cases of the selected solvers, print the results
+            and compare them with the baseline file, or save them as the new baseline.
+            Exit with 1 if any case fails, regresses or changes its output.
+    '''
+    parser = argparse.ArgumentParser(description='Benchmark the Reversi, wedding and Bayesian network solvers.')
+    parser.add_argument('--solvers', nargs='+', choices=SOLVERS, default=SOLVERS, help='solvers to benchmark')
+    parser.add_argument('--scale', type=int, default=SCALE, help='size factor of the generated workloads')
+    parser.add_argument('--repeat', type=int, default=REPEAT, help='runs of each case, the best time is reported')
+    parser.add_argument('--timeout', type=float, default=TIMEOUT, help='seconds before a case is stopped')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='fraction of time or memory above the baseline reported as a regression')
+    parser.add_argument('--bundled-only', action='store_true', help='run only the bundled input files')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='baseline file to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='save the results as the baseline file instead of comparing with it')
+    parser.add_argument('--json', metavar='FILE', help='save the results of all cases as JSON')
+    parser.add_argument('--encodings', action='store_true', help='print the report of the at-most-one encodings of the wedding rules instead')
+    args = parser.parse_args()
+    if args.encodings:
+        executeEncodingReport(args.scale)
+        sys.exit(0)
+    else:
+        pass
+    results, failures = executeBenchmark(args.solvers, args.scale, args.repeat, args.timeout, args.baseline,
+                                         args.save_baseline, not args.bundled_only, args.tolerance)
+    if args.json:
+        with open(args.json, 'w') as _fp:
+            json.dump(dict(results), _fp, indent=1, sort_keys=True, separators=(',', ': '))
+    else:
+        pass
+    skipped = sum(1 for _key, _result in results if _result['status'] == STATUS_SKIPPED)
+    print ('%d of %d cases passed, %d skipped, %d failed or regressed.'%(len(results) - skipped - failures, len(results), skipped, failures))
+    sys.exit(1 if failures else 0)
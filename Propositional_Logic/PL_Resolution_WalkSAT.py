@@ -19,25 +19,48 @@ Propositional_Logic: A propositional logic operation class in CNF with DPLL and
         2. every literal in set should be associated with OR
     
     Major Functions:
-    1. is_satisfiable(KB, algorithm = 'DPLL'): This implementation include DPLL and PL_Resolution algorithm to verify the satisfiability of the sentence.
-        You can choose either 'DPLL' or 'PL_Resolution' to switch the algorithm.
+    1. is_satisfiable(KB, algorithm = 'DPLL'): This implementation include DPLL, CDCL and PL_Resolution algorithm to verify the satisfiability of the sentence.
+        You can choose 'DPLL', 'CDCL' or 'PL_Resolution' to switch the algorithm.
     2. DPLL: This algorithm is used for checking satisfiability of a CNF sentence in propositional logic.
         The method will also store the satisfiable model into the 'model' variable in class.
+        The search is run by DPLL_Solver with watched literal unit propagation.
+    2.1 CDCL: Like DPLL, the search is run by CDCL_Solver with clause learning, back jumping, VSIDS and restarts.
+    2.2 portfolio: Race the complete algorithm and WalkSAT with different noise p and seeds in processes. The first definitive answer wins.
     3. WalkSAT: Inference methods which are implemented to provide one of models in CNF sentence of propositional logic.
+        The counts of true literals per clause, the unsatisfied clauses and the make/break counts of the variables are updated on each flip.
     4. PL_Resolution: A structure only class. Need to be completed in the future.
         The class will check a propositional logic sentence is satisfy or not.
+    All solvers run on the sentence compiled to an Integer_CNF.
+    
+DPLL_Solver: DPLL search on an Integer_CNF with two watched literals per clause and an assignment trail.
+    Unit propagation only visits the clauses which watch a literal that has just become false, 
+    and backtracking unassigns the tail of the trail without touching the clauses.
+    
+CDCL_Solver: Conflict driven clause learning on DPLL_Solver.
+    A conflict is analysed to the first unique implication point and learned as a clause, the search jumps back to the level 
+    where the clause implies a literal. Decisions follow VSIDS activities, the search restarts by the Luby sequence and the 
+    learned clauses with low activities are deleted. The learned clauses can be kept as a proof of UNSAT and checked.
+    
+Integer_CNF: A CNF sentence compiled to integers like DIMACS.
+    Every symbol is a variable numbered from 1, a literal is +variable or -variable (NOT symbol), 
+    and the literals of all clauses are kept in one flat array with the offsets of the clauses.
+    The symbol table maps the variables back to the symbol names, e.g. 'guest,table' for Wedding.getResults.
     
 Prop_KB: A knowledge base can be Ask, Tell in propositional logic by CNF.
     Major Functions:
         tell(clauses): input CNF clauses.
         ask(CNF_query) will not implement in this case.
         get_sentence(): will present the KB in a CNF sentence.        
+        get_CNF(): will present the KB in an Integer_CNF.
     
 Wedding: A wedding arrangement class to solve a the question.
     1. According to given rule to generate CNF sentence.
+       Groups of friends are merged by union-find into one block of symbols, enemies in one group are 'no' at once.
+       One table per guest is encoded by AT_MOST_ONE, and SYMMETRY_BREAKING numbers the tables in the order of their first guests.
     2. Input the sentence to KB.
     3. Verifing the KB is satisfiable or not.
     4. If the KB is satisfiable, then get a model/solution by WalkSAT.
+       With PORTFOLIO, the steps 3 and 4 race in processes instead.
     5. Printing the results.
 
 
@@ -58,6 +81,14 @@ Wedding: A wedding arrangement class to solve a the question.
 from __future__ import print_function 
 import sys
 import random
+import time
+import heapq
+import multiprocessing
+try:
+    from queue import Empty
+except ImportError:
+    from Queue import Empty
+from array import array
 from datetime import datetime
 
 
@@ -81,7 +112,16 @@ VARIABLE_SPLITTER = ',' #the separator for variables guest and table arrangement
 AND = '^'
 OR = 'v'
 NOT = '~'
-ALGORITHM = 'DPLL' # or 'PL_Resolution'
+ALGORITHM = 'DPLL' # or 'CDCL' or 'PL_Resolution'
+CDCL_RESTART = 100 # Conflicts of a restart unit of CDCL, multiplied by the Luby sequence.
+CDCL_DECAY = 0.95 # VSIDS activity decay of CDCL after each conflict.
+CDCL_CHECK = False # True will check every CDCL answer: the model satisfies the sentence, or the learned clauses are a proof of UNSAT.
+AT_MOST_ONE = 'pairwise' # or 'sequential', 'commander', 'product': the encoding of 'everyone should be at only one table'.
+SYMMETRY_BREAKING = True # True will number the tables in the order of their first guests, one arrangement of the T! arrangements with renamed tables.
+FRIEND_GROUPS = True # True will merge the friends by union-find and encode one block of symbols for each group of friends.
+AUXILIARY = '#' # the prefix of the auxiliary symbols of the at-most-one encodings, getResults skips them.
+PORTFOLIO = False # True will race ALGORITHM and WalkSAT processes in Wedding.execution, the first definitive answer wins.
+PORTFOLIO_WALKSAT = [0.5, 0.3, 0.2] # Noise p of each WalkSAT process in the portfolio, every process has its own random seed.
 
 def getInputData(filename):
 #
@@ -158,6 +198,21 @@ def setOutputData(filename='', isSatisfy=None, arrangement={}):
         exit()
         
         
+def runPortfolioSolver(KB, algorithm, p, seed, queue):
+#
+# Run one solver of the portfolio in its own process.
+#  Put (index, is_satisfiable, model) to the queue, is_satisfiable is None if the solver has no definitive answer.
+    random.seed(seed)
+    _plg = Propositional_Logic()
+    _plg.set_timer()
+    if algorithm == 'WalkSAT':
+        _model = _plg.WalkSAT(KB.get_CNF(), p)
+        queue.put((seed, None if _model is None else True, _model))
+    else:
+        _is_satisfiable = _plg.is_satisfiable(KB, algorithm)
+        queue.put((seed, _is_satisfiable, _plg.model if _is_satisfiable else None))
+
+
 class Wedding (object):
     # a class for wedding information & rules generator from input file.
     def __init__(self, guests=0, tables=0, restrictions=0):
@@ -167,7 +222,11 @@ class Wedding (object):
         self.CNFSentance = []
         self.CNFRestriction = []
         self.CNFDomainSpace = []
+        self.CNFSymmetry = [] # Symmetry breaking clauses at the end of CNFSentance, only for the complete algorithms.
         self.arrangement = {}
+        self.auxiliaries = 0 # Number of auxiliary symbols of the at-most-one encodings.
+        self.groups = {} # first guest => guests of a group of friends.
+        self.conflict = None # A pair of enemies in one group of friends.
     
     def execution(self):
         # Main program to enable wedding arrangement.
@@ -182,20 +241,39 @@ class Wedding (object):
         else:
             self.CNFSentance = self.getWeddingRules()
             if DEBUG: print(self.CNFSentance)
+            if self.conflict is not None: # Enemies in one group of friends.
+                return False, {}
+            else:
+                pass
            
         _kb.tell(self.CNFSentance)
+        # WalkSAT runs without the symmetry breaking clauses, their chains of auxiliary symbols slow down the local search.
+        if self.CNFSymmetry != []:
+            _walksat_kb = Prop_KB(self.CNFSentance[:len(self.CNFSentance) - len(self.CNFSymmetry)])
+        else:
+            _walksat_kb = _kb
+        if PORTFOLIO: # Race the solvers instead of DPLL then WalkSAT.
+            _is_satisfiable = _plg.portfolio(_kb, ALGORITHM, PORTFOLIO_WALKSAT, _walksat_kb)
+            if _is_satisfiable is True:
+                _arrangement = self.getResults(_plg.model)
+            else:
+                pass
+            if DEBUG: print ('Wedding arrangement=%s, %r'%(_arrangement, _is_satisfiable))
+            return _is_satisfiable, _arrangement
+        else:
+            pass
         _is_satisfiable = _plg.is_satisfiable(_kb, ALGORITHM)
         
         if DEBUG: print('_is_satisfiable= %r'%(_is_satisfiable))
         if _is_satisfiable is True or _is_satisfiable is None: # if satisfiable or run out of time
             if DEBUG: print('_is_satisfiable is True= %r'%(_is_satisfiable))
             _plg.set_timer()
-            _arrangement = _plg.WalkSAT(_kb.get_sentence()) # Get result model from WalkSAT, or try to get result from WalkSAT
+            _arrangement = _plg.WalkSAT(_walksat_kb.get_CNF()) # Get result model from WalkSAT, or try to get result from WalkSAT
             if _arrangement is not None:
                 _is_satisfiable = True  #***new added but not in the submit version.
                 _arrangement = self.getResults(_arrangement)
-            elif ALGORITHM == 'DPLL' and _arrangement is None and _is_satisfiable is True:#if WalkSAT no result but DPLL has a model
-                _arrangement = _plg.model # Get satisfy result model from DPLL if WalkSAT fail.
+            elif ALGORITHM in ('DPLL', 'CDCL') and _arrangement is None and _is_satisfiable is True:#if WalkSAT no result but DPLL has a model
+                _arrangement = _plg.model # Get satisfy result model from DPLL or CDCL if WalkSAT fail.
                 _arrangement = self.getResults(_arrangement)
             else:
                 _arrangement = {}
@@ -214,49 +292,66 @@ class Wedding (object):
         _friend_in_same_table = []
         _enemy_in_different_table = []
         _CNFClauses = []
-        _tmp_guest = None
-        _tmp_set = set()
+        self.auxiliaries = 0
+        self.CNFSymmetry = []
+
+        # Friends sit at the same table, so each group of friends shares one block of symbols of its first guest.
+        if FRIEND_GROUPS:
+            self.groups = self.getFriendGroups()
+        else:
+            self.groups = dict((_guest, [_guest]) for _guest in range(1, self.guests+1))
+        _representatives = dict((_guest, _first) for _first in self.groups for _guest in self.groups[_first])
+        _blocks = sorted(self.groups)
+        _symbols = dict((_guest, [None] + [str(_guest)+VARIABLE_SPLITTER+str(_tablei) for _tablei in range(1, self.tables+1)]) for _guest in _blocks)
+        self.conflict = None
+        for _rule in self.restrictions:
+            if _rule[2] == 'E' and _representatives[int(_rule[0])] == _representatives[int(_rule[1])]:
+                self.conflict = (int(_rule[0]), int(_rule[1]))
+                if DEBUG: print('Enemies %s and %s are in one group of friends.'%(_rule[0], _rule[1]))
+                return [set()] # The empty clause, the rules can not be satisfied.
+            else:
+                pass
 
             # For each guest should be able to assign into any table.
             # v Xai = CNF        
-        for _guest in range(1, self.guests+1):
-            for _tablei in range(1, self.tables+1):        
-                if _tmp_guest != _guest:
-                    _tmp_guest = _guest
-                    _tmp_set = {str(_guest)+VARIABLE_SPLITTER+str(_tablei)}
-                else:
-                    _tmp_set.add(str(_guest)+VARIABLE_SPLITTER+str(_tablei))
-            _everyone_possible_on_any_table.append(_tmp_set)
+        for _guest in _blocks:
+            _everyone_possible_on_any_table.append(set(_symbols[_guest][1:]))
 
         # And everyone should be at only one table
-        # CNF
-        # ^[~(Xai ^ Xaj)] = ^[(~Xai v ~Xaj)]
-        for _guest in range(1, self.guests+1):
-            for _tablei in range(1, self.tables+1):
-                for _tablej in range(1, self.tables+1):
-                    if (_tablei != _tablej):
-                        _everyone_only_exist_one_table.append({NOT+str(_guest)+VARIABLE_SPLITTER+str(_tablei), NOT+str(_guest)+VARIABLE_SPLITTER+str(_tablej)})
+        # CNF by AT_MOST_ONE encoding, pairwise is
+        # ^[~(Xai ^ Xaj)] = ^[(~Xai v ~Xaj)] for i < j
+        for _guest in _blocks:
+            _everyone_only_exist_one_table.extend(self.getAtMostOne(_symbols[_guest][1:]))
 
-        # for each pair of friends, guest a and b should in same table.
-        # ^[(~Xai v Xbi)^(Xai v ~Xbi)] = CNF                        
+        # for each pair of friends in different blocks, guest a and b should in same table.
+        # ^[(~Xai v Xbi)^(Xai v ~Xbi)] = CNF
+        # for each pair of enemies, guest a and b should not in same table.
+        #  ^ [~(Xai ^ Xbi)]=^[~Xai v ~Xbi] = CNF
+        # Pairs are counted once between two blocks.
+        _pairs = set()
         for _rule in self.restrictions:
+            _a = _representatives[int(_rule[0])]
+            _b = _representatives[int(_rule[1])]
+            if (min(_a, _b), max(_a, _b), _rule[2]) in _pairs or (_rule[2] == 'F' and _a == _b):
+                continue
+            else:
+                _pairs.add((min(_a, _b), max(_a, _b), _rule[2]))
             if _rule[2] == 'F':
                 for _tablei in range(1, self.tables+1):
-                    _friend_in_same_table.append({NOT+str(_rule[0])+VARIABLE_SPLITTER+str(_tablei),str(_rule[1])+VARIABLE_SPLITTER+str(_tablei)})
-                    _friend_in_same_table.append({str(_rule[0])+VARIABLE_SPLITTER+str(_tablei),NOT+str(_rule[1])+VARIABLE_SPLITTER+str(_tablei)}) 
-                
-            # for each pair of enemies, guest a and b should not in same table.
-            #  ^ [~(Xai ^ Xbi)]=^[~Xai v ~Xbi] = CNF
+                    _friend_in_same_table.append({NOT+_symbols[_a][_tablei], _symbols[_b][_tablei]})
+                    _friend_in_same_table.append({_symbols[_a][_tablei], NOT+_symbols[_b][_tablei]})
             elif _rule[2] == 'E':
                 for _tablej in range(1, self.tables+1):
-                    _enemy_in_different_table.append({NOT+str(_rule[0])+VARIABLE_SPLITTER+str(_tablej), NOT+str(_rule[1])+VARIABLE_SPLITTER+str(_tablej)})
-                else:
-                    pass      
+                    _enemy_in_different_table.append({NOT+_symbols[_a][_tablej], NOT+_symbols[_b][_tablej]})
+            else:
+                pass      
                           
         if _everyone_possible_on_any_table != []: _CNFClauses.extend(_everyone_possible_on_any_table)
         if _everyone_only_exist_one_table != []: _CNFClauses.extend(_everyone_only_exist_one_table)
         if _friend_in_same_table != []: _CNFClauses.extend(_friend_in_same_table)
         if _enemy_in_different_table != []: _CNFClauses.extend(_enemy_in_different_table) 
+        self.CNFSymmetry = self.getSymmetryBreaking(_blocks, _symbols) if SYMMETRY_BREAKING else []
+        if self.CNFSymmetry != []: _CNFClauses.extend(self.CNFSymmetry)
         
 #         if _everyone_only_exist_one_table != []: self.CNFDomainSpace.extend(_everyone_only_exist_one_table)
 #         if _everyone_possible_on_any_table != []: self.CNFDomainSpace.extend(_everyone_possible_on_any_table)
@@ -265,6 +360,118 @@ class Wedding (object):
 #         if _enemy_in_different_table != []: self.CNFRestriction.extend(_enemy_in_different_table)
         
         return _CNFClauses
+
+    def getFriendGroups(self):
+        # Merge the friends by union-find, all guests connected by friend relations sit at the same table.
+        # Return {first guest of the group: [guests of the group]}.
+        _parents = list(range(self.guests+1))
+        _sizes = [1] * (self.guests+1)
+        for _rule in self.restrictions:
+            if _rule[2] == 'F':
+                _a = self.getGroupRoot(_parents, int(_rule[0]))
+                _b = self.getGroupRoot(_parents, int(_rule[1]))
+                if _a != _b: # Union by size.
+                    if _sizes[_a] < _sizes[_b]: _a, _b = _b, _a
+                    _parents[_b] = _a
+                    _sizes[_a] += _sizes[_b]
+                else:
+                    pass
+            else:
+                pass
+        _groups = {}
+        for _guest in range(1, self.guests+1):
+            _groups.setdefault(self.getGroupRoot(_parents, _guest), []).append(_guest)
+        return dict((_group[0], _group) for _group in _groups.values())
+
+    def getGroupRoot(self, parents, guest):
+        # Find the root of the guest's group, halving the path on the way.
+        while parents[guest] != guest:
+            parents[guest] = parents[parents[guest]]
+            guest = parents[guest]
+        return guest
+
+    def getSymmetryBreaking(self, blocks, symbols):
+        # Tables are interchangeable, so only the arrangement whose tables are numbered in the order of their first guests is allowed:
+        # guest a can sit at table i+1 only if a guest before a sits at table i. The first guest sits at table 1.
+        # blocks are the guests with symbols in order, symbols[guest][table] is the symbol of the guest at the table.
+        # Uai is an auxiliary symbol, Uai is true only if one of the guests up to a sits at table i.
+        # CNF for the guests a-1, a in blocks
+        # ^[~X1i] for i > 1
+        # ^[(~U1i v X1i) ^ (~Uai v Ua-1,i v Xai)] for i < tables
+        # ^[(~Xai+1 v Ua-1,i)] for i < tables
+        _clauses = []
+        _used = [] # [[None, Uai for i < tables] for the blocks before the last one]
+        for _tablei in range(2, self.tables+1):
+            _clauses.append({NOT+symbols[blocks[0]][_tablei]})
+        for _k, _guest in enumerate(blocks[:-1]):
+            _used.append([None] + [self.getAuxiliarySymbol() for _tablei in range(1, self.tables)])
+            for _tablei in range(1, self.tables):
+                if _k == 0:
+                    _clauses.append({NOT+_used[_k][_tablei], symbols[_guest][_tablei]})
+                else:
+                    _clauses.append({NOT+_used[_k][_tablei], _used[_k-1][_tablei], symbols[_guest][_tablei]})
+        for _k, _guest in enumerate(blocks[1:]):
+            for _tablei in range(1, self.tables):
+                _clauses.append({NOT+symbols[_guest][_tablei+1], _used[_k][_tablei]})
+        return _clauses
+
+    def getAuxiliarySymbol(self):
+        self.auxiliaries += 1
+        return AUXILIARY + str(self.auxiliaries)
+
+    def getAtMostOne(self, symbols, encoding=None):
+        # Clauses which allow at most one of the symbols to be true, by the encoding or AT_MOST_ONE.
+        #  pairwise: (~Xi v ~Xj) for i < j, n(n-1)/2 clauses.
+        #  sequential: Si is true if one of X1..Xi is true, (~Xi v Si) ^ (~Si-1 v Si) ^ (~Xi v ~Si-1), 3n-4 clauses and n-1 auxiliary symbols.
+        #  commander: groups of 3 symbols are pairwise with a commander Ci, (~Xi v Ci), and at most one commander is true (by commander again), about 3n clauses.
+        #  product: the symbols on a grid of p rows x q columns, (~Xij v Ri) ^ (~Xij v Cj), and at most one row and one column are true (by product again), 
+        #           2n + O(sqrt(n)) clauses.
+        # Below 5 symbols, all encodings are pairwise.
+        _n = len(symbols)
+        if encoding is None: encoding = AT_MOST_ONE
+        if encoding == 'pairwise' or _n < 5:
+            return [{NOT+symbols[_i], NOT+symbols[_j]} for _i in range(_n) for _j in range(_i+1, _n)]
+        elif encoding == 'sequential':
+            _counters = [self.getAuxiliarySymbol() for _i in range(_n-1)]
+            _clauses = [{NOT+symbols[0], _counters[0]}]
+            for _i in range(1, _n-1):
+                _clauses.append({NOT+symbols[_i], _counters[_i]})
+                _clauses.append({NOT+_counters[_i-1], _counters[_i]})
+                _clauses.append({NOT+symbols[_i], NOT+_counters[_i-1]})
+            _clauses.append({NOT+symbols[_n-1], NOT+_counters[_n-2]})
+            return _clauses
+        elif encoding == 'commander':
+            _clauses = []
+            _commanders = []
+            for _i in range(0, _n, 3):
+                _group = symbols[_i:_i+3]
+                if len(_group) == 1: # A single symbol is its own commander.
+                    _commanders.append(_group[0])
+                    continue
+                else:
+                    pass
+                _commander = self.getAuxiliarySymbol()
+                _commanders.append(_commander)
+                _clauses.extend(self.getAtMostOne(_group, 'pairwise'))
+                _clauses.extend({NOT+_symbol, _commander} for _symbol in _group)
+            _clauses.extend(self.getAtMostOne(_commanders, 'commander'))
+            return _clauses
+        elif encoding == 'product':
+            _p = 1
+            while _p * _p < _n:
+                _p += 1
+            _q = (_n + _p - 1) // _p
+            _rows = [self.getAuxiliarySymbol() for _i in range(_p)]
+            _columns = [self.getAuxiliarySymbol() for _j in range(_q)]
+            _clauses = []
+            for _k, _symbol in enumerate(symbols):
+                _clauses.append({NOT+_symbol, _rows[_k // _q]})
+                _clauses.append({NOT+_symbol, _columns[_k % _q]})
+            _clauses.extend(self.getAtMostOne(_rows, 'product'))
+            _clauses.extend(self.getAtMostOne(_columns, 'product'))
+            return _clauses
+        else:
+            raise Exception('Unknown at-most-one encoding %s'%(encoding))
         
     def getResults(self, model):
         # Get a model and refined it to the result of arrangement.
@@ -273,18 +480,593 @@ class Wedding (object):
         _arrangement = {}
         
         for _symbol in model:
-            if model[_symbol] == True:
+            if model[_symbol] == True and not _symbol.startswith(AUXILIARY): # Skip the auxiliary symbols of the at-most-one encodings.
                 _guest_table = _symbol.split(VARIABLE_SPLITTER)
-                _arrangement.update({_guest_table[0]:_guest_table[1]}) #{guest: table}
+                for _guest in self.groups.get(int(_guest_table[0]), [_guest_table[0]]): # Every guest of the group of friends.
+                    _arrangement.update({str(_guest):_guest_table[1]}) #{guest: table}
                 
         return _arrangement     
         
         
+class Integer_CNF(object):
+    '''
+    A CNF sentence compiled to integers, like the DIMACS format:
+        1. Every symbol, e.g. '3,2' (guest 3 at table 2), is a variable numbered from 1 by the symbol table.
+        2. A literal is a signed integer, +variable for the symbol and -variable for its negation (~symbol).
+        3. The literals of all clauses are kept in one flat array, and clause k is literals[offsets[k]:offsets[k+1]].
+    The symbol table maps variables back to symbol names, so a model of variables becomes a model of symbols for Wedding.getResults.
+    '''
+    def __init__(self, sentence=[]):
+        self.symbols = [None] # variable => symbol name, variable 0 is not used.
+        self.variables = {} # symbol name => variable
+        self.literals = array('i')
+        self.offsets = array('i', [0])
+        self.clauses = None # Clauses as tuples, built on demand.
+        for _clause in sentence:
+            self.add_clause(_clause)
+
+    def get_variable(self, symbol):
+        # Return the variable of a symbol name, a new variable for a new symbol.
+        _variable = self.variables.get(symbol)
+        if _variable is None:
+            _variable = len(self.symbols)
+            self.variables[symbol] = _variable
+            self.symbols.append(symbol)
+        else:
+            pass
+        return _variable
+
+    def get_literal(self, literal):
+        # Convert a literal string, e.g. '~3,2', to a signed integer literal.
+        if literal.startswith(NOT):
+            return -self.get_variable(literal[len(NOT):])
+        else:
+            return self.get_variable(literal)
+
+    def get_literal_name(self, literal):
+        # Convert a signed integer literal back to a literal string.
+        if literal < 0:
+            return NOT + self.symbols[-literal]
+        else:
+            return self.symbols[literal]
+
+    def add_clause(self, clause):
+        # Add a clause of literal strings or signed integer literals.
+        for _literal in clause:
+            if isinstance(_literal, int):
+                self.literals.append(_literal)
+            else:
+                self.literals.append(self.get_literal(_literal))
+        self.offsets.append(len(self.literals))
+        self.clauses = None
+
+    def get_clause(self, k):
+        return self.literals[self.offsets[k]:self.offsets[k + 1]]
+
+    def get_clauses(self):
+        # Return all clauses as a list of tuples of integer literals.
+        if self.clauses is None:
+            self.clauses = [tuple(self.literals[self.offsets[_k]:self.offsets[_k + 1]]) for _k in range(len(self.offsets) - 1)]
+        else:
+            pass
+        return self.clauses
+
+    def get_clause_count(self):
+        return len(self.offsets) - 1
+
+    def get_variable_count(self):
+        return len(self.symbols) - 1
+
+    def get_model(self, model):
+        # Convert a model of {variable: value} to a model of {symbol name: value}.
+        return dict((self.symbols[_variable], _value) for _variable, _value in model.items() if _value is not None)
+
+    def get_sentence(self):
+        # Convert back to the sentence of literal string sets.
+        return [set(self.get_literal_name(_literal) for _literal in _clause) for _clause in self.get_clauses()]
+        
+        
+class DPLL_Solver(object):
+    '''
+    DPLL search on an Integer_CNF with two watched literals per clause and an assignment trail.
+        1. Every clause of two or more literals watches its first two literals. A clause is only visited when one of its watched literals becomes false:
+           it watches another literal which is not false, or it becomes a unit clause (the other watched literal is implied), 
+           or a conflict (all literals are false). Backtracking does not touch the watches.
+        2. The trail keeps the assigned literals in order, trail_limits keeps where each decision level starts on the trail,
+           so backtracking to a level unassigns the tail of the trail.
+        3. Decisions take the lowest unassigned variable with value True first. On a conflict the last decision which has not been flipped
+           is flipped (chronological backtracking).
+    '''
+    def __init__(self, cnf):
+        self.cnf = cnf
+        self.variable_count = cnf.get_variable_count()
+        self.values = [None] * (self.variable_count + 1) # variable => True, False or None if unassigned.
+        self.levels = [0] * (self.variable_count + 1) # variable => decision level of its assignment.
+        self.reasons = [None] * (self.variable_count + 1) # variable => clause index which implied it, None for a decision.
+        self.trail = [] # Assigned literals in assignment order.
+        self.trail_limits = [] # Trail length before each decision level.
+        self.flipped = [] # The decision of each decision level has been flipped.
+        self.queue_head = 0 # Trail position of the next literal to propagate.
+        self.next_variable = 1 # No variable below it is unassigned.
+        self.watches = [[] for _i in range(2 * self.variable_count + 2)] # watch index of literal => clauses watching the literal.
+        self.clauses = [] # Clauses as lists, the watched literals at positions 0 and 1.
+        self.is_unsatisfiable = False # An empty clause or conflicting unit clauses were added.
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+        for _clause in cnf.get_clauses():
+            self.add_clause(_clause)
+
+    def get_watch_index(self, literal):
+        return 2 * literal if literal > 0 else 1 - 2 * literal
+
+    def get_value(self, literal):
+        # True, False or None of a literal under the current assignment.
+        _value = self.values[abs(literal)]
+        if _value is None:
+            return None
+        else:
+            return _value == (literal > 0)
+
+    def add_clause(self, clause):
+        # Add a clause at decision level 0. Duplicated literals are removed and tautologies are skipped.
+        # Literals which are already false are moved behind the others, so they are not watched.
+        _literals = list(set(clause))
+        if any(-_literal in _literals for _literal in _literals):
+            return None
+        else:
+            pass
+        _literals.sort(key=lambda _literal: self.get_value(_literal) is False)
+        if not _literals or self.get_value(_literals[0]) is False:
+            self.is_unsatisfiable = True
+            return None
+        elif len(_literals) == 1 or self.get_value(_literals[1]) is False:
+            if self.get_value(_literals[0]) is None:
+                self.assign(_literals[0], None)
+            else:
+                pass
+            return None
+        else:
+            _index = len(self.clauses)
+            self.clauses.append(_literals)
+            self.watches[self.get_watch_index(_literals[0])].append(_index)
+            self.watches[self.get_watch_index(_literals[1])].append(_index)
+            return _index
+
+    def assign(self, literal, reason):
+        _variable = abs(literal)
+        self.values[_variable] = literal > 0
+        self.levels[_variable] = len(self.trail_limits)
+        self.reasons[_variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        # Unit propagation of the literals on the trail after queue_head.
+        # Return the index of a conflicting clause, or None.
+        _values = self.values
+        _watches = self.watches
+        _clauses = self.clauses
+        while self.queue_head < len(self.trail):
+            _false_literal = -self.trail[self.queue_head]
+            self.queue_head += 1
+            _watch_index = 2 * _false_literal if _false_literal > 0 else 1 - 2 * _false_literal
+            _watch_list = _watches[_watch_index]
+            _kept = []
+            for _k, _index in enumerate(_watch_list):
+                _clause = _clauses[_index]
+                if _clause[0] == _false_literal:
+                    _clause[0], _clause[1] = _clause[1], _false_literal
+                else:
+                    pass
+                _other = _clause[0]
+                _value = _values[abs(_other)]
+                if _value is not None and _value == (_other > 0): # The clause is true by the other watched literal.
+                    _kept.append(_index)
+                    continue
+                else:
+                    pass
+                for _m in range(2, len(_clause)):
+                    _literal = _clause[_m]
+                    _v = _values[abs(_literal)]
+                    if _v is None or _v == (_literal > 0): # Watch a literal which is not false.
+                        _clause[1], _clause[_m] = _literal, _false_literal
+                        _watches[2 * _literal if _literal > 0 else 1 - 2 * _literal].append(_index)
+                        break
+                    else:
+                        pass
+                else:
+                    _kept.append(_index)
+                    if _value is None: # Unit clause implies the other watched literal.
+                        self.assign(_other, _index)
+                        self.propagations += 1
+                    else: # All literals are false.
+                        _kept.extend(_watch_list[_k + 1:])
+                        _watches[_watch_index] = _kept
+                        self.conflicts += 1
+                        return _index
+            _watches[_watch_index] = _kept
+        return None
+
+    def backtrack(self, level):
+        # Unassign all literals above the decision level.
+        if len(self.trail_limits) > level:
+            _limit = self.trail_limits[level]
+            for _literal in self.trail[_limit:]:
+                _variable = abs(_literal)
+                self.values[_variable] = None
+                self.reasons[_variable] = None
+                if _variable < self.next_variable: self.next_variable = _variable
+            del self.trail[_limit:]
+            del self.trail_limits[level:]
+            del self.flipped[level:]
+            self.queue_head = len(self.trail)
+        else:
+            pass
+
+    def decide(self, literal, flipped=False):
+        # Open a new decision level with the literal.
+        self.trail_limits.append(len(self.trail))
+        self.flipped.append(flipped)
+        self.decisions += 1
+        self.assign(literal, None)
+
+    def get_decision_variable(self):
+        # The lowest unassigned variable, or None if all variables are assigned.
+        while self.next_variable <= self.variable_count and self.values[self.next_variable] is not None:
+            self.next_variable += 1
+        if self.next_variable <= self.variable_count:
+            return self.next_variable
+        else:
+            return None
+
+    def solve(self, assumptions=[], time_limit=None):
+        # Return True with a model in values, False if the sentence is unsatisfiable under the assumptions (literals at level 0), 
+        # or None if time_limit seconds run out.
+        _deadline = None if time_limit is None else time.time() + time_limit
+        _next_check = 0 # The time is checked every 256 decisions.
+        if self.is_unsatisfiable:
+            return False
+        else:
+            pass
+        for _literal in assumptions:
+            _value = self.get_value(_literal)
+            if _value is False:
+                return False
+            elif _value is None:
+                self.assign(_literal, None)
+            else:
+                pass
+        if self.propagate() is not None:
+            return False
+        else:
+            pass
+        while True:
+            _variable = self.get_decision_variable()
+            if _variable is None:
+                return True
+            else:
+                pass
+            if _deadline is not None and self.decisions >= _next_check:
+                _next_check = self.decisions + 256
+                if time.time() >= _deadline: return None
+            else:
+                pass
+            self.decide(_variable)
+            while self.propagate() is not None:
+                # Flip the last decision which has not been flipped.
+                while self.flipped and self.flipped[-1]:
+                    self.backtrack(len(self.trail_limits) - 1)
+                if not self.trail_limits:
+                    return False
+                else:
+                    pass
+                _decision = self.trail[self.trail_limits[-1]]
+                self.backtrack(len(self.trail_limits) - 1)
+                self.decide(-_decision, True)
+
+    def is_implied(self, clause):
+        # Reverse unit propagation at decision level 0: True if the clause is false and unit propagation
+        # of its negation gives a conflict.
+        if self.is_unsatisfiable or self.propagate() is not None:
+            self.is_unsatisfiable = True
+            return True
+        else:
+            pass
+        self.trail_limits.append(len(self.trail))
+        self.flipped.append(False)
+        _is_conflict = False
+        for _literal in clause:
+            _value = self.get_value(_literal)
+            if _value is True:
+                _is_conflict = True
+                break
+            elif _value is None:
+                self.assign(-_literal, None)
+            else:
+                pass
+        if not _is_conflict:
+            _is_conflict = self.propagate() is not None
+        else:
+            pass
+        self.backtrack(0)
+        return _is_conflict
+
+    def get_model(self):
+        # Model of {variable: value} of the current assignment.
+        return dict((_variable, self.values[_variable]) for _variable in range(1, self.variable_count + 1) if self.values[_variable] is not None)
+
+    def get_statistics(self):
+        return {'variables': self.variable_count, 'clauses': len(self.clauses), 'decisions': self.decisions,
+                'propagations': self.propagations, 'conflicts': self.conflicts}
+
+
+class CDCL_Solver(DPLL_Solver):
+    '''
+    Conflict driven clause learning on the watched literals, the trail and the reasons of DPLL_Solver.
+        1. A conflict is resolved back along the reasons on the trail to the first unique implication point (1-UIP) of the conflict level.
+           The learned clause is added and the search jumps back to the second highest level of the clause, where the clause implies the 1-UIP literal.
+        2. Decisions take the unassigned variable with the highest VSIDS activity from a heap. The variables of every conflict analysis are bumped
+           and the bump grows by 1/CDCL_DECAY after each conflict, so old activities decay. A variable takes its last value again (phase saving).
+        3. The search restarts at level 0 after CDCL_RESTART times the Luby sequence (1, 1, 2, 1, 1, 2, 4, ...) of conflicts.
+           At a restart with too many learned clauses, the half of them with the lowest activities is deleted (binary clauses are kept)
+           and the clauses which are true at level 0 are removed.
+        4. Every learned clause is implied by unit propagation of the clauses before it, so the learned clauses ending with the empty clause
+           are a proof of UNSAT which check_proof replays when the solver keeps the proof.
+    '''
+    def __init__(self, cnf, keep_proof=False):
+        DPLL_Solver.__init__(self, cnf)
+        self.activities = [0.0] * (self.variable_count + 1) # variable => VSIDS activity.
+        self.phases = [True] * (self.variable_count + 1) # variable => last value.
+        self.heap = [(0.0, _variable) for _variable in range(1, self.variable_count + 1)] # (-activity, variable), unassigned variables are always in it.
+        self.bump = 1.0
+        self.seen = [False] * (self.variable_count + 1) # Variables in the conflict analysis.
+        self.learned = [False] * len(self.clauses) # clause index => it is a learned clause.
+        self.clause_activities = [0.0] * len(self.clauses)
+        self.clause_bump = 1.0
+        self.learned_count = 0
+        self.max_learned = len(self.clauses) // 3 + 100 # Learned clauses are reduced at a restart above it, and it grows by 10% then.
+        self.assumptions = []
+        self.proof = [] if keep_proof else None # Learned clauses in order.
+        self.restarts = 0
+        self.deleted = 0
+
+    def bump_variable(self, variable):
+        self.activities[variable] += self.bump
+        if self.activities[variable] > 1e100: # Rescale all activities.
+            self.activities = [_activity * 1e-100 for _activity in self.activities]
+            self.bump *= 1e-100
+            self.heap = [(-self.activities[_variable], _variable) for _variable in range(1, self.variable_count + 1) if self.values[_variable] is None]
+            heapq.heapify(self.heap)
+        elif self.values[variable] is None:
+            heapq.heappush(self.heap, (-self.activities[variable], variable))
+        else:
+            pass
+
+    def bump_clause(self, index):
+        self.clause_activities[index] += self.clause_bump
+        if self.clause_activities[index] > 1e20: # Rescale all clause activities.
+            self.clause_activities = [_activity * 1e-20 for _activity in self.clause_activities]
+            self.clause_bump *= 1e-20
+        else:
+            pass
+
+    def backtrack(self, level):
+        # Save the values and put the unassigned variables back to the heap.
+        if len(self.trail_limits) > level:
+            for _literal in self.trail[self.trail_limits[level]:]:
+                _variable = abs(_literal)
+                self.phases[_variable] = _literal > 0
+                heapq.heappush(self.heap, (-self.activities[_variable], _variable))
+            DPLL_Solver.backtrack(self, level)
+            if len(self.heap) > 4 * self.variable_count: # Drop the old entries.
+                self.heap = [(-self.activities[_variable], _variable) for _variable in range(1, self.variable_count + 1) if self.values[_variable] is None]
+                heapq.heapify(self.heap)
+            else:
+                pass
+        else:
+            pass
+
+    def get_decision_variable(self):
+        # The unassigned variable with the highest activity, or None if all variables are assigned.
+        while self.heap:
+            _activity, _variable = heapq.heappop(self.heap)
+            if self.values[_variable] is None:
+                return _variable
+            else:
+                pass
+        return None
+
+    def analyze(self, conflict):
+        # Resolve the conflicting clause with the reasons of the literals of the conflict level, latest first,
+        # until only one literal of the conflict level (the 1-UIP) is left.
+        # Return the learned clause with the negated 1-UIP first and a literal of the back jump level second, and the back jump level.
+        _seen = self.seen
+        _level = len(self.trail_limits)
+        _learned = [0]
+        _pending = 0 # Literals of the conflict level not resolved yet.
+        _position = len(self.trail) - 1
+        _literal = None
+        _index = conflict
+        while True:
+            if self.learned[_index]: self.bump_clause(_index)
+            _clause = self.clauses[_index]
+            for _other in (_clause if _literal is None else _clause[1:]): # The first literal of a reason is the implied literal.
+                _variable = abs(_other)
+                if not _seen[_variable] and self.levels[_variable] > 0:
+                    _seen[_variable] = True
+                    self.bump_variable(_variable)
+                    if self.levels[_variable] == _level:
+                        _pending += 1
+                    else:
+                        _learned.append(_other)
+                else:
+                    pass
+            while not _seen[abs(self.trail[_position])]:
+                _position -= 1
+            _literal = self.trail[_position]
+            _position -= 1
+            _seen[abs(_literal)] = False
+            _pending -= 1
+            if _pending == 0:
+                break
+            else:
+                _index = self.reasons[abs(_literal)]
+        _learned[0] = -_literal
+        for _other in _learned[1:]:
+            _seen[abs(_other)] = False
+        if len(_learned) == 1:
+            return _learned, 0
+        else:
+            _k = max(range(1, len(_learned)), key=lambda _k: self.levels[abs(_learned[_k])])
+            _learned[1], _learned[_k] = _learned[_k], _learned[1]
+            return _learned, self.levels[abs(_learned[1])]
+
+    def add_learned_clause(self, clause):
+        # Add the learned clause after the back jump, and assign its first literal which it implies.
+        if self.proof is not None: self.proof.append(list(clause))
+        if len(clause) == 1:
+            self.assign(clause[0], None)
+        else:
+            _index = len(self.clauses)
+            self.clauses.append(clause)
+            self.learned.append(True)
+            self.clause_activities.append(0.0)
+            self.learned_count += 1
+            self.bump_clause(_index)
+            self.watches[self.get_watch_index(clause[0])].append(_index)
+            self.watches[self.get_watch_index(clause[1])].append(_index)
+            self.assign(clause[0], _index)
+
+    def reduce_learned(self):
+        # At decision level 0: delete the half of the learned clauses with the lowest activities,
+        # remove the clauses which are true and the literals which are false, and watch again.
+        _learned = sorted((_index for _index in range(len(self.clauses)) if self.learned[_index] and len(self.clauses[_index]) > 2),
+                          key=lambda _index: self.clause_activities[_index])
+        _deleted = set(_learned[:len(_learned) // 2])
+        _clauses = []
+        _flags = []
+        _activities = []
+        for _index, _clause in enumerate(self.clauses):
+            if _index in _deleted or any(self.get_value(_literal) is True for _literal in _clause):
+                continue
+            else:
+                _clauses.append([_literal for _literal in _clause if self.get_value(_literal) is None])
+                _flags.append(self.learned[_index])
+                _activities.append(self.clause_activities[_index])
+        self.deleted += len(_deleted)
+        self.clauses = _clauses
+        self.learned = _flags
+        self.clause_activities = _activities
+        self.learned_count = sum(_flags)
+        for _literal in self.trail: # The reasons at level 0 are never analysed.
+            self.reasons[abs(_literal)] = None
+        self.watches = [[] for _i in range(2 * self.variable_count + 2)]
+        for _index, _clause in enumerate(self.clauses):
+            self.watches[self.get_watch_index(_clause[0])].append(_index)
+            self.watches[self.get_watch_index(_clause[1])].append(_index)
+
+    def get_luby(self, i):
+        # The i-th number of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ... (i from 1).
+        while True:
+            _k = 1
+            while (1 << _k) - 1 < i:
+                _k += 1
+            if (1 << _k) - 1 == i:
+                return 1 << (_k - 1)
+            else:
+                i -= (1 << (_k - 1)) - 1
+
+    def learn_empty_clause(self):
+        if self.proof is not None: self.proof.append([])
+        return False
+
+    def solve(self, assumptions=[], time_limit=None):
+        # Return True with a model in values, False if the sentence is unsatisfiable under the assumptions (literals at level 0),
+        # or None if time_limit seconds run out.
+        _deadline = None if time_limit is None else time.time() + time_limit
+        _next_check = 0 # The time is checked every 256 decisions.
+        _luby_index = 1
+        _next_restart = self.conflicts + CDCL_RESTART
+        self.assumptions = list(assumptions)
+        if self.is_unsatisfiable:
+            return self.learn_empty_clause()
+        else:
+            pass
+        for _literal in assumptions:
+            _value = self.get_value(_literal)
+            if _value is False:
+                return self.learn_empty_clause()
+            elif _value is None:
+                self.assign(_literal, None)
+            else:
+                pass
+        while True:
+            _conflict = self.propagate()
+            if _conflict is not None:
+                if not self.trail_limits:
+                    return self.learn_empty_clause()
+                else:
+                    pass
+                _learned, _level = self.analyze(_conflict)
+                self.backtrack(_level)
+                self.add_learned_clause(_learned)
+                self.bump /= CDCL_DECAY
+                self.clause_bump /= 0.999
+                continue
+            elif self.conflicts >= _next_restart:
+                self.backtrack(0)
+                self.restarts += 1
+                _luby_index += 1
+                _next_restart = self.conflicts + CDCL_RESTART * self.get_luby(_luby_index)
+                if self.learned_count > self.max_learned:
+                    self.reduce_learned()
+                    self.max_learned += self.max_learned // 10
+                else:
+                    pass
+            else:
+                pass
+            _variable = self.get_decision_variable()
+            if _variable is None:
+                return True
+            else:
+                pass
+            if _deadline is not None and self.decisions >= _next_check:
+                _next_check = self.decisions + 256
+                if time.time() >= _deadline: return None
+            else:
+                pass
+            self.decide(_variable if self.phases[_variable] else -_variable)
+
+    def check_proof(self):
+        # Replay the kept proof on a new DPLL_Solver of the sentence and the assumptions.
+        # True if every learned clause is implied by reverse unit propagation and the proof ends with the empty clause.
+        if self.proof is None or not self.proof or self.proof[-1]:
+            return False
+        else:
+            pass
+        _checker = DPLL_Solver(self.cnf)
+        for _literal in self.assumptions:
+            _checker.add_clause([_literal])
+        for _clause in self.proof:
+            if not _checker.is_implied(_clause):
+                return False
+            else:
+                _checker.add_clause(_clause)
+        return True
+
+    def get_statistics(self):
+        _statistics = DPLL_Solver.get_statistics(self)
+        _statistics.update({'learned': self.learned_count, 'deleted': self.deleted, 'restarts': self.restarts})
+        return _statistics
+
+        
 class Propositional_Logic(object):
     def __init__(self):    
         self.sentence = []
         self.symbols = set()
         self.model = {} # The truth results
+        self.cnf = None # Integer_CNF of the sentence being solved.
+        self.statistics = {} # Counters of the last complete solver.
         self.begin_time = None
     
     def set_timer(self):
@@ -341,353 +1123,302 @@ class Propositional_Logic(object):
                 if (self.is_not(_symbol)): _symbol = _symbol[1:]
                 _symbol_set.add(_symbol)   
         return _symbol_set
-    
+
+    def get_CNF(self, sentence=[]):
+        # Compile a sentence of string clauses into an Integer_CNF, or use an Integer_CNF as it is.
+        if isinstance(sentence, Integer_CNF):
+            self.cnf = sentence
+        else:
+            self.cnf = Integer_CNF(sentence)
+        return self.cnf
                     
     def is_satisfiable(self, KB, algorithm = 'DPLL', model={}):       
         self.begin_time = datetime.now()
         _is_satisfiable = False
-        _sentence = KB.get_sentence()
-        self.symbols = self.get_symbols(_sentence)
-        if DEBUG: print('self.symbols=%s'%(str(sorted(list(self.symbols)))))
+        _cnf = self.get_CNF(KB.get_CNF())
+        self.symbols = set(range(1, _cnf.get_variable_count() + 1))
+        if DEBUG: print('self.symbols=%s'%(str(_cnf.symbols[1:])))
 
         if algorithm == 'DPLL':
             if PRINT_TIME : print ('is_satisfiable=>DPLL.Start=>%s'%(str(datetime.now())))            
-            _is_satisfiable = self.DPLL(_sentence, self.symbols, model)
+            _is_satisfiable = self.DPLL(_cnf, self.symbols, model)
             if PRINT_TIME : print ('is_satisfiable=>DPLL.Finish=>%s'%(str(datetime.now())))            
+        elif algorithm == 'CDCL':
+            if PRINT_TIME : print ('is_satisfiable=>CDCL.Start=>%s'%(str(datetime.now())))
+            _is_satisfiable = self.CDCL(_cnf, model)
+            if PRINT_TIME : print ('is_satisfiable=>CDCL.Finish=>%s'%(str(datetime.now())))
         elif algorithm == 'PL_Resolution':
             _is_satisfiable = self.PL_Resolution(KB)
         return _is_satisfiable
         
     def DPLL(self, sentence=[], symbols=set(), model={}):
-        _symbols = set(symbols)
-        _model = dict(model)
-        _is_true = False
-        _unknown_clauses = []  # clauses with an unknown truth value
-        _return = None
-        _p = None
-        _v = None
-        if PRINT_TIME : print ('DPLL. is_true_PL. Start=>%s'%(str(datetime.now())))
-        for _clause in sentence:
-            _return = self.is_true_PL(_clause, _model)
-            if _return is False: return False
-            elif _return is None:
-                _unknown_clauses.append(_clause)
+        # sentence is an Integer_CNF or a list of string clauses, and model is a partial model of {symbol name: value} to start with.
+        # The DPLL_Solver branches on all variables of the sentence, symbols is kept for compatibility.
+        # Return True and keep the model in self.model, False if unsatisfiable, or None if RESOURCE_DPLL runs out.
+        _cnf = self.get_CNF(sentence)
+        if self.begin_time is None: self.set_timer()
+        _solver = DPLL_Solver(_cnf)
+        _assumptions = [_cnf.get_variable(_symbol) * (1 if _value else -1) for _symbol, _value in model.items()]
+        _time_limit = RESOURCE_DPLL - (datetime.now() - self.begin_time).total_seconds()
+        _is_satisfiable = _solver.solve(_assumptions, _time_limit)
+        self.statistics = _solver.get_statistics()
+        if DEBUG: print('DPLL statistics = %s'%(self.statistics))
+        if _is_satisfiable:
+            self.model = _cnf.get_model(_solver.get_model())
+            if DEBUG: print('model = %s'%(sorted(self.model.items())))
+        else:
+            pass
+        return _is_satisfiable
+
+    def CDCL(self, sentence=[], model={}):
+        # Like DPLL with a CDCL_Solver, in the same RESOURCE_DPLL time.
+        # With CDCL_CHECK, a model is checked on the sentence and an UNSAT answer is checked by its proof, an Exception is raised if a check fails.
+        _cnf = self.get_CNF(sentence)
+        if self.begin_time is None: self.set_timer()
+        _solver = CDCL_Solver(_cnf, CDCL_CHECK)
+        _assumptions = [_cnf.get_variable(_symbol) * (1 if _value else -1) for _symbol, _value in model.items()]
+        _time_limit = RESOURCE_DPLL - (datetime.now() - self.begin_time).total_seconds()
+        _is_satisfiable = _solver.solve(_assumptions, _time_limit)
+        self.statistics = _solver.get_statistics()
+        if DEBUG: print('CDCL statistics = %s'%(self.statistics))
+        if _is_satisfiable:
+            _model = _solver.get_model()
+            if CDCL_CHECK and not all(self.is_true_PL(_clause, _model) for _clause in _cnf.get_clauses()):
+                raise Exception('CDCL model does not satisfy the sentence.')
             else:
                 pass
-        if PRINT_TIME : print ('DPLL. is_true_PL. finish=>%s'%(str(datetime.now())))              
-        if _unknown_clauses == []:
-            self.model = model
-            if DEBUG: print('model = %s'%(sorted(model.items())))
-            return True  # model is one of the answer by DPLL.
-        else:
-            #if _model is None: _model = {}  
-            #if _symbols is None: _symbols = set()
-            _p, _v = self.get_pure_symbol(_symbols, _unknown_clauses)
-            if _p :
-                _symbols = self.remove_both_symbol(_symbols, _p)
-                _model.update({_p:_v})
-                return self.DPLL(_unknown_clauses, _symbols, _model)
-            else: pass
-            
-            _p, _v = self.get_unit_clause(_unknown_clauses, _model)
-            if _p :
-                _symbols = self.remove_both_symbol(_symbols, _p)
-                _model.update({_p:_v})
-                return self.DPLL(_unknown_clauses, _symbols, _model)
-            else: pass
-            
-            _symbols, _p, _v = self.pop_symbol(_symbols)
-            _true_model = dict(_model)
-            _true_model.update({_p: _v})
-            _false_model = dict(model)
-            _false_model.update({_p: not _v})
-            if (datetime.now() - self.begin_time).total_seconds() >= RESOURCE_DPLL:
-                return None
-            return (self.DPLL(_unknown_clauses, _symbols, _true_model) or self.DPLL(_unknown_clauses, _symbols, _false_model))
-
-    def get_pure_symbol(self, clause=set(), sentence=[]):  
-        #DPLL algorithm get pure symbol which only exist positive form in whole sentence (or negative form in whole sentence.)
-        _is_not_symbol = ''
-        _positive_symbol = ''
-        _negative_symbol = ''
-        if PRINT_TIME : print ('get_pure_symbol=>Start=>%s'%(str(datetime.now())))    
-        for _symbol in clause:
-            _has_positive = False
-            _has_negative = False
-            _is_not_symbol = False
-            for _clause in sentence:
-                if self.is_not(_symbol): 
-                    _negative_symbol = _symbol
-                    _positive_symbol = _symbol[1:] # If the symbol include a ~ in front of it. It's negative symbol and program will remove ~ from symbol
-                    _is_not_symbol = True # The symbol include a ~ in front of it.
-                else:
-                    _possibly_sorted = _symbol
-                    _negative_symbol = NOT+_symbol
-                    
-                if _positive_symbol in _clause: _has_positive = True
-                if _negative_symbol in _clause: _has_negative = True
-            # return negative symbol asap.
-            if (_has_positive == False) and (_has_negative == True): # flip the symbol and value
-                return _positive_symbol, False 
-            
-        if PRINT_TIME : print ('get_pure_symbol=>finish=>%s'%(str(datetime.now()))) 
-        if (_has_positive == True) and (_has_negative == False) :
-            return _positive_symbol, True  
+            self.model = _cnf.get_model(_model)
+            if DEBUG: print('model = %s'%(sorted(self.model.items())))
+        elif _is_satisfiable is False and CDCL_CHECK and not _solver.check_proof():
+            raise Exception('CDCL proof of UNSAT does not check.')
         else:
-            return None, None
-        
-    def get_unit_clause(self, sentence, model):        
-        # Return one of unit clause in a sentence.
-        # a unit clause only contains single literal.
-        _literal = ''
-        if PRINT_TIME : print ('get_unit_clause=>Start=>%s'%(str(datetime.now()))) 
-        for _clause in sentence:
-            if len(_clause) == 1:
-                _literal = next(iter(_clause))
-                if (self.is_not(_literal)): # Find negative unit clause asap.
-                    return _literal[1:], False
+            pass
+        return _is_satisfiable
+
+    def portfolio(self, KB, algorithm='DPLL', probabilities=[PROBABILITY], walksat_KB=None):
+        # Race the complete algorithm and one WalkSAT for each noise p in probabilities, each one in its own process.
+        # WalkSAT runs on walksat_KB instead if it is given, which must be satisfiable if and only if KB is, e.g. KB without symmetry breaking clauses.
+        # The first definitive answer, a model which satisfies the sentence or False from the complete algorithm, terminates the others.
+        # Return True and keep the model in self.model, False, or None if no solver has a definitive answer in time.
+        if walksat_KB is None: walksat_KB = KB
+        _queue = multiprocessing.Queue()
+        _solvers = [(algorithm, None)] + [('WalkSAT', _p) for _p in probabilities]
+        _seed = random.randint(0, 2**30)
+        _processes = []
+        for _k, (_algorithm, _p) in enumerate(_solvers):
+            _process = multiprocessing.Process(target=runPortfolioSolver, args=(walksat_KB if _algorithm == 'WalkSAT' else KB, _algorithm, _p, _seed + _k, _queue))
+            _process.start()
+            _processes.append(_process)
+        _begin = time.time()
+        _deadline = _begin + max(RESOURCE_DPLL, RESOURCE_WALKSAT) + 1
+        _is_satisfiable = None
+        _answers = 0
+        while _is_satisfiable is None and _answers < len(_solvers) and time.time() < _deadline:
+            _is_alive = any(_process.is_alive() for _process in _processes)
+            try:
+                _k, _answer, _model = _queue.get(True, min(_deadline - time.time(), 0.5))
+            except Empty:
+                if _is_alive: continue
+                else: break # A solver died without an answer.
+            _k -= _seed
+            _answers += 1
+            if _answer is True: # Verify the model on the sentence of the solver.
+                _cnf = (walksat_KB if _solvers[_k][0] == 'WalkSAT' else KB).get_CNF()
+                _values = dict((_cnf.variables[_symbol], _value) for _symbol, _value in _model.items())
+                if all(self.is_true_PL(_clause, _values) for _clause in _cnf.get_clauses()):
+                    _is_satisfiable = True
+                    self.model = _model
                 else:
                     pass
-        if PRINT_TIME : print ('get_unit_clause=>finish=>%s'%(str(datetime.now())))                 
-        if _literal != '':
-            return _literal, True
-        else:
-            return None, None
-    
-    def remove_symbol(self, symbols=set(), remove_symbol=''):
-        # Remove the symbol from symbol set
-        symbols.discard(remove_symbol)  
-        return symbols
-
-    def remove_both_symbol(self, symbols=set(), remove_symbol=''):
-        # Remove a symbol and its negative form from symbol set
-        _positive_symbol = ''
-        _negative_symbol = ''
-        
-        if(self.is_not(remove_symbol)):
-            # if symbol include ~ operator
-            _positive_symbol = remove_symbol[1:]
-            _negative_symbol = remove_symbol
-        else:
-            _positive_symbol = remove_symbol
-            _negative_symbol = NOT+remove_symbol 
-        symbols.discard(_positive_symbol)
-        symbols.discard(_negative_symbol)    
-        return symbols
-
-    def pop_symbol(self, symbols=set()):
-        # Pop a symbol with a boolean=True value from symbol set
-        # If the symbol is negative form, then convert it to positive symbol and flip the boolean value to False.
-        _symbol = ''
-        _bl = True
-        
-        if symbols == set(): return symbols, None
-        else: 
-            for _s in symbols:
-                if self.is_not(_s):
-                    _symbol = _s
-                    symbols.discard(_symbol)
-                    break;
-            if _symbol == '':  
-                _symbol = symbols.pop()
-            
-        if(self.is_not(_symbol)):
-            # if symbol include ~ operator
-            _symbol = _symbol[1:]
-            _bl = False
-            symbols.discard(_symbol)
-        else:
-            symbols.discard(NOT+_symbol)
-        return symbols, _symbol, _bl 
-
-    def get_random_symbol(self, clause=set()):
-        # Will get a symbol from symbol set with its boolean value=True. The selected symbol will still keep in the symbol set. 
-        # If the symbol is negative form, convert it to positive form and flip the boolean value = False.
-        _symbol = ''
-        _bl = True
-        if clause == set(): return None
-        else: 
-            _symbol = random.sample(clause, 1)
-            _symbol = _symbol[0] #get symbol from list
-            _bl = True
-            
-        if(self.is_not(_symbol)):
-            # if symbol include ~ operator
-            _symbol = _symbol[1:]
-            _bl = False
-        return _symbol, _bl
+            elif _answer is False and _solvers[_k][0] != 'WalkSAT':
+                _is_satisfiable = False
+            else:
+                pass
+            if _is_satisfiable is not None:
+                self.statistics = {'solver': _solvers[_k][0], 'p': _solvers[_k][1], 'time': time.time() - _begin}
+                if DEBUG: print('portfolio winner = %s'%(self.statistics))
+            else:
+                pass
+        for _process in _processes:
+            if _process.is_alive(): _process.terminate()
+            _process.join()
+        return _is_satisfiable
+
+    def get_random_symbol(self, clause=()):
+        # Will get a variable of a random literal in the clause with the boolean value which makes the literal true. 
+        if not clause: return None
+        _literal = random.choice(clause)
+        return abs(_literal), _literal > 0
     
-    def is_true_PL(self, clause=set(), model={}):
+    def is_true_PL(self, clause=(), model={}):
+        # Truth value of a clause of integer literals in a partial model {variable: value}: True, False or None if unknown.
         _is_true = False
-        _is_not_symbol = False
-        _symbol = ''
         _value = None
 
-        if model == {} : return None
-        
         for _literal in clause:
-            _value = None
-            _is_not_symbol = False
-            if(self.is_not(_literal)):
-                _is_not_symbol = True
-                _symbol = _literal[1:]
+            _value = model.get(abs(_literal))
+            if _value is None: 
+                _is_true = None
+            elif _value == (_literal > 0):
+                return True
             else:
-                _symbol = _literal
-            
-            _value = model.get(_symbol) #always convert symbol in clause to positive form to compare with model. 
-            if (_value == True and _is_not_symbol == False) or (_value == False and _is_not_symbol == True):
-                #if the value is true and original symbol does not include ~. (or the value is false and original symbol include ~)
-                _is_true = True
-                break
-            elif (_value == False and _is_not_symbol == False) or (_value == True and _is_not_symbol == True):
                 pass
-            else: #_value is None
-                _is_true = None
-
-        if _is_true:
-            return True
-        elif _is_true is None:
-            return None
-        else:
-            return False                  
+        return _is_true
           
     def WalkSAT(self, sentence=[], p=PROBABILITY, max_flips=MAX_FLIPS):
-        _symbols = self.get_positive_symbols(sentence)
-        _model = {}
+        # sentence is an Integer_CNF or a list of string clauses. Return a model of {symbol name: value} or None.
+        # The state is kept incrementally, so a flip only visits the clauses of the flipped variable:
+        #   occurrences: watch index of literal => clauses with the literal.
+        #   true_counts: clause => number of its true literals.
+        #   unsatisfied / positions: the clauses with no true literal, and clause => its position in unsatisfied or -1.
+        #   make_counts: variable => unsatisfied clauses which become true by flipping it.
+        #   break_counts: variable => clauses whose only true literal is of the variable, they become false by flipping it.
+        _cnf = self.get_CNF(sentence)
+        _clauses = [tuple(set(_clause)) for _clause in _cnf.get_clauses() if not any(-_literal in _clause for _literal in _clause)] # Tautologies are always true.
+        _variable_count = _cnf.get_variable_count()
+        if self.begin_time is None: self.set_timer()
+        if any(not _clause for _clause in _clauses): return None # An empty clause can never be true.
         
         # Random assignment true or false to the symbol in symbol set
-        _model = {symbol: random.choice([True, False]) for symbol in _symbols}
+        _model = [None] + [random.choice([True, False]) for _variable in range(_variable_count)]
+        _occurrences = [[] for _i in range(2 * _variable_count + 2)]
+        _true_counts = [0] * len(_clauses)
+        _unsatisfied = []
+        _positions = [-1] * len(_clauses)
+        _make_counts = [0] * (_variable_count + 1)
+        _break_counts = [0] * (_variable_count + 1)
+        for _index, _clause in enumerate(_clauses):
+            _true_literal = None
+            for _literal in _clause:
+                _occurrences[2 * _literal if _literal > 0 else 1 - 2 * _literal].append(_index)
+                if _model[abs(_literal)] == (_literal > 0):
+                    _true_counts[_index] += 1
+                    _true_literal = _literal
+                else:
+                    pass
+            if _true_counts[_index] == 0:
+                _positions[_index] = len(_unsatisfied)
+                _unsatisfied.append(_index)
+                for _literal in _clause:
+                    _make_counts[abs(_literal)] += 1
+            elif _true_counts[_index] == 1:
+                _break_counts[abs(_true_literal)] += 1
+            else:
+                pass
         
         for _i in range(max_flips):
-            _satisfied_clauses, _unsatisfied_clauses = [], []
-            for clause in sentence:
-                if self.is_true_PL(clause, _model):
-                    _satisfied_clauses.append(clause)
-                else:
-                    _unsatisfied_clauses.append(clause)
-            if _unsatisfied_clauses == []:  # if there is no 'not satisfied' clause in sentence.
-                self.model = _model
-                return _model
-            clause = random.choice(_unsatisfied_clauses)
+            if not _unsatisfied:  # if there is no 'not satisfied' clause in sentence.
+                self.model = _cnf.get_model(dict(enumerate(_model)))
+                return self.model
+            clause = _clauses[random.choice(_unsatisfied)]
             if random.random() < p:
                 _symbol, _v = self.get_random_symbol(clause)
             else:
                 # Flip the symbol in clause that maximizes the number of satisfiable clauses
-                _symbol = self.get_max_satisfiable_symbol(clause, sentence, _model)
+                _symbol = self.get_max_satisfiable_symbol(clause, _make_counts, _break_counts)
             _model[_symbol] = not _model[_symbol]
+            _true = _symbol if _model[_symbol] else -_symbol # The literal which becomes true.
+            # Clauses of the literal which becomes false.
+            for _index in _occurrences[-2 * _true if _true < 0 else 1 + 2 * _true]:
+                _true_counts[_index] -= 1
+                if _true_counts[_index] == 0: # The flipped variable was its only true literal.
+                    _break_counts[_symbol] -= 1
+                    _positions[_index] = len(_unsatisfied)
+                    _unsatisfied.append(_index)
+                    for _literal in _clauses[_index]:
+                        _make_counts[abs(_literal)] += 1
+                elif _true_counts[_index] == 1: # The last true literal breaks it now.
+                    for _literal in _clauses[_index]:
+                        if _model[abs(_literal)] == (_literal > 0):
+                            _break_counts[abs(_literal)] += 1
+                            break
+                        else:
+                            pass
+                else:
+                    pass
+            # Clauses of the literal which becomes true.
+            for _index in _occurrences[2 * _true if _true > 0 else 1 - 2 * _true]:
+                _true_counts[_index] += 1
+                if _true_counts[_index] == 1: # It was unsatisfied.
+                    _break_counts[_symbol] += 1
+                    _last = _unsatisfied.pop()
+                    if _last != _index:
+                        _unsatisfied[_positions[_index]] = _last
+                        _positions[_last] = _positions[_index]
+                    else:
+                        pass
+                    _positions[_index] = -1
+                    for _literal in _clauses[_index]:
+                        _make_counts[abs(_literal)] -= 1
+                elif _true_counts[_index] == 2: # The other true literal does not break it any more.
+                    for _literal in _clauses[_index]:
+                        if _literal != _true and _model[abs(_literal)] == (_literal > 0):
+                            _break_counts[abs(_literal)] -= 1
+                            break
+                        else:
+                            pass
+                else:
+                    pass
             # If no solution is found within the flip limit, will return None
-            if (datetime.now() - self.begin_time).total_seconds() >= RESOURCE_WALKSAT:
+            if _i % 256 == 255 and (datetime.now() - self.begin_time).total_seconds() >= RESOURCE_WALKSAT:
                 return None
         if DEBUG: print('max_flips=%d'%(max_flips))
         return None
      
-    def get_max_satisfiable_symbol(self, selected_clause, sentence, model):
-        # Flip the symbol in clause and get the maximizes number of satisfiable clauses
-        _max_symbol = ''
-        _max_count = 0
-        _symbols = self.get_positive_symbols(selected_clause)
-        for _symbol in _symbols:
-            _count = 0
-            for _clause in sentence:
-                if self.is_true_PL(_clause, self.flip_model(model, _symbol)):
-                    _count += 1
-            if _max_count < _count:
+    def get_max_satisfiable_symbol(self, selected_clause, make_counts, break_counts):
+        # The symbol in clause which maximizes the number of satisfiable clauses after its flip,
+        # i.e. the highest make count minus break count, the lowest variable for a tie.
+        _max_symbol = None
+        _max_count = None
+        for _symbol in sorted(set(abs(_literal) for _literal in selected_clause)):
+            _count = make_counts[_symbol] - break_counts[_symbol]
+            if _max_count is None or _max_count < _count:
                 _max_count = _count
                 _max_symbol = _symbol
         return _max_symbol
         
-    def flip_model(self, model, symbol):
-        # Flip the symbol in given model
-        _model = dict(model)
-        _model[symbol] = not _model[symbol]
-        return _model
-        
     def PL_Resolution(self, KB = None, alpha = None): 
-        _clauses = []
-        _clause_pairs = []
+        # Resolution on the Integer_CNF of the KB. Clauses are frozensets of integer literals.
+        _cnf = self.get_CNF(KB.get_CNF())
+        _clauses = set(frozenset(_clause) for _clause in _cnf.get_clauses())
         _is_satisfiable = False
-#        _is_only_negative_literal = True
-        if alpha is None and KB is not None:
+        if alpha is None:
             _is_satisfiable = True
-            _clauses = KB.get_sentence()
         else:
-            _clauses = KB.get_sentence().append({NOT+alpha}) #KB ^ ~alpha
+            _clauses.add(frozenset([-_cnf.get_literal(alpha)])) #KB ^ ~alpha
         
-        _new = []
+        _new = set()
 
         while True:
-            n = len(_clauses)
+            _clause_list = list(_clauses)
+            n = len(_clause_list)
             for i in range(n):
                 for j in range(i+1, n):
-                    _clause_pairs.append((_clauses[i], _clauses[j]))
-
-            for (ci, cj) in _clause_pairs:
-                _resolvents = self.PL_Resolve(ci, cj)
-                if set() in _resolvents:
-                    if DEBUG:print('_resolvents=:%s'%(_resolvents))
-                    if _is_satisfiable:
-                        if DEBUG: print('resolvent is empty set()')
-                        return False
-                    else:
+                    _resolvents = self.PL_Resolve(_clause_list[i], _clause_list[j])
+                    if frozenset() in _resolvents:
                         if DEBUG: print('resolvent is empty set()')
-                        return True
-                if _resolvents != []:
-                    _new = self.add_set(_new, _resolvents)
+                        return not _is_satisfiable
+                    _new.update(_resolvents)
                     # add resolvents into _new set.
-            if self.is_subset_in_list(_new, _clauses):
-                if _is_satisfiable:
-                    if DEBUG: print('new is set of clauses')
-                    return True
-                else:
-                    if DEBUG: print('new is set of clauses')
-                    return False
-                
-            for _clause in _new:
-                if _clause not in _clauses:
-                    _clauses.append(_clause)
-            _new = []
-            if DEBUG:print('PL_Resolution=>clauses:%s'%(_clauses))
+            if _new <= _clauses:
+                if DEBUG: print('new is set of clauses')
+                return _is_satisfiable
+            _clauses.update(_new)
+            _new = set()
+            if DEBUG:print('PL_Resolution=>clauses:%d'%(len(_clauses)))
     
     def PL_Resolve(self, ci, cj):
         #Return all clauses that can be obtained by resolving clauses ci and cj.
+        # Tautologies, which include a literal and its negation, are always true and not returned.
         _clauses = []
     
-        for _symbol_i in ci:
-            for _symbol_j in cj:
-                if (_symbol_i == NOT+_symbol_j) or (_symbol_j == NOT+_symbol_i) :
-                    _dnew = self.get_unique_set(self.remove_symbol(set(ci), _symbol_i), self.remove_symbol(set(cj), _symbol_j))
+        for _literal in ci:
+            if -_literal in cj:
+                _dnew = (ci - {_literal}) | (cj - {-_literal})
+                if not any(-_l in _dnew for _l in _dnew):
                     _clauses.append(_dnew)
     
         return _clauses
-    
-    def get_unique_set(self, clausei, clausej):
-        # Join clause i and j to form a new clause without redundant literal.
-        _unique_set = clausei
-        for _symbol in clausej:
-            _unique_set.add(_symbol)
-        return _unique_set
-    
-    def add_set(self, set_list, sets):
-        # Add sets into list and avoid redundant set
-        _set_list = list(set_list) 
-        for _set in sets: 
-            _is_exist = False
-            for _existing_set in _set_list:
-                if _existing_set == _set:
-                    _is_exist = True
-            if not _is_exist:
-                _set_list.append(_set)
-        return _set_list
-    
-    def is_subset_in_list(self, subsets, set_list):       
-        # if all set in subsets are included in set list, return True.         
-        _is_subset = True
-        
-        for _subset in subsets :
-            if not (_subset in set_list):
-                _is_subset = False
-                break
-        return _is_subset
                 
                 
 class Prop_KB(object):
@@ -695,6 +1426,7 @@ class Prop_KB(object):
     def __init__(self, clause=None):    
         self.agenda = []
         self.sentence = []
+        self.cnf = None # Integer_CNF compiled from the sentence on demand.
         
         if clause is not None:
             self.tell(clause)
@@ -705,6 +1437,7 @@ class Prop_KB(object):
             _is_known = True
         else:
             self.sentence.extend(clause)     
+            self.cnf = None
         return _is_known
     
     def ask(self, qery):
@@ -713,6 +1446,14 @@ class Prop_KB(object):
     
     def get_sentence(self):
         return self.sentence
+
+    def get_CNF(self):
+        # Return the sentence compiled to an Integer_CNF, compiled once after the last tell.
+        if self.cnf is None:
+            self.cnf = Integer_CNF(self.sentence)
+        else:
+            pass
+        return self.cnf
     
 
         